@@ -1,35 +1,102 @@
 import sys
-import pygame
+import argparse
+import asyncio
+import hashlib
+import json
+import marshal
+import math
+import mmap
+import os
 import random
+import struct
+import threading
 import time
+import zlib
+from abc import ABC, abstractmethod
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
+from functools import lru_cache
+from statistics import NormalDist
+
+# pygame is imported lazily by GameUI so that headless simulations never load it, and NumPy
+# likewise by BatchEngine.
+pygame = None
+np = None
 
 class BattleshipHunter:
     """The AI hunter class for the Battleship game. Hunts for and targets ships on the board."""
 
-    def __init__(self, _game_manager):
+    def __init__(self, _game_manager, strategy="basic", rng=None):
 
         self.game_manager = _game_manager
+        # The hunter's own random stream, so its choices don't depend on any other randomness.
+        self.rng = rng or random.Random()
+        self.config = _game_manager.config
         # Create the empty board.
         self.create_board()
         # The ships that have not been sunk yet.
-        self.ships = {
-            ShipCell.DESTROYER : 2,
-            ShipCell.SUBMARINE : 3,
-            ShipCell.CRUISER : 3,
-            ShipCell.BATTLESHIP : 4,
-            ShipCell.CARRIER : 5,
-        }
+        self.ships = {ship_cell: size for ship_cell, name, size in self.config.ships}
         # Ships that have been hit but not sunk.
         self.hits = {}
         # Number of shots that have hit a ship.
         self.shots_hit = 0
         # Total number of shots attempted.
         self.total_shots = 0
+        # Number of turns where targeting found no cell and hunting was used instead.
+        self.hunt_fallbacks = 0
+        self.set_strategy(strategy)
+
+    def set_strategy(self, strategy):
+        """
+        Creates the hunt and target policies for a strategy and binds them to the hunter.
+
+        The strategy is either a single name, such as "density", or a "hunt:target" pair, such as
+        "clusters:directional". A single name uses the target policy of the same name if there is
+        one, and basic targeting otherwise. A "+endgame" suffix plays the last ships with the
+        exact EndgameSolver. The policies' methods are bound once here, so
+        take_turn calls them directly, and only the event callbacks a policy overrides are called
+        after each shot.
+
+        Parameters:
+            strategy (str): The name of the strategy.
+        """
+        hunt_name, target_name, endgame = split_strategy(strategy)
+        self.strategy = hunt_name + ":" + target_name + ("+endgame" if endgame else "")
+        # The exact solver for the last few ships, if the strategy asks for it.
+        self.endgame = None
+        if endgame:
+
+            self.endgame = endgame_solver(self.board.width, self.board.height,
+                                          tuple(ship_cell for ship_cell, name, size in self.config.ships))
+        self.hunt_policy = HUNT_POLICIES[hunt_name](self)
+        # A policy registered for both roles shares one instance, and so one set of state.
+        target_class = TARGET_POLICIES[target_name]
+        if isinstance(self.hunt_policy, target_class):
+
+            self.target_policy = self.hunt_policy
+
+        else:
+
+            self.target_policy = target_class(self)
+
+        self.hunt = self.hunt_policy.hunt
+        self.target = self.target_policy.target
+        policies = [self.hunt_policy]
+        if self.target_policy is not self.hunt_policy:
+
+            policies.append(self.target_policy)
+
+        self.miss_listeners = [policy.on_miss for policy in policies
+                               if type(policy).on_miss is not HunterPolicy.on_miss]
+        self.hit_listeners = [policy.on_hit for policy in policies
+                              if type(policy).on_hit is not HunterPolicy.on_hit]
+        self.sink_listeners = [policy.on_sink for policy in policies
+                               if type(policy).on_sink is not HunterPolicy.on_sink]
 
     def create_board(self):
         """Initializes an empty board, as the hunter has no information on the game so far."""
-        self.board = [[ShipCell.EMPTY for _ in range(10)] for _ in range(10)]
+        self.board = Bitboard(self.config.width, self.config.height)
 
     def set_mode(self, mode):
         """
@@ -38,7 +105,9 @@ class BattleshipHunter:
         Parameters:
             mode (Mode): The new value for the mode variable.
         """
-        Log.log("Switching mode to " + str(mode.name) + "...")
+        if Log.debug:
+
+            Log.log("Switching mode to %s...", mode.name, level=LogLevel.DEBUG)
         self.mode = mode
 
     def take_turn(self):
@@ -53,14 +122,27 @@ class BattleshipHunter:
         """
         # Task 1:
 
+        # Once few enough placements of the last ships are left, play them exactly.
+        if self.endgame is not None:
+
+            choice = self.endgame.choose(self)
+            if choice is not None:
+
+                self.set_mode(Mode.ENDGAME)
+                return choice
+
         # If there are hits on ships that haven't been sunk, return the result of the targeting
         # method.
         if len(self.hits):
             self.set_mode(Mode.TARGETING)
-            return self.target_basic()
+            choice = self.target()
+            if choice is not None:
+                return choice
+            # Targeting found nothing, so fall back to hunting.
+            self.hunt_fallbacks += 1
         # Otherwise, return the result of the hunting method.
         self.set_mode(Mode.HUNTING)
-        return self.hunt_basic()
+        return self.hunt()
 
     def hunt_basic(self):
         """
@@ -76,17 +158,13 @@ class BattleshipHunter:
         """
         # Task 2:
 
-        # Create a list of empty cells. Should go through all y values, then every other x value
-        # starting at either 0 or 1, creating a checkerboard pattern.
-        empty = []
-        for y in range(len(self.board)):
-            for x in range(y % 2, len(self.board[y]), 2):
-                if self.board[y][x] == ShipCell.EMPTY:
-                    empty.append((x, y))
-        # Choose a random cell from the list.
-        choice = random.choice(empty)
-        # Return the chosen cell.
-        return choice
+        # Mask the empty cells with the checkerboard pattern, where x and y have the same parity.
+        # Bits are ordered like the rows of the board, so this picks the same cell as choosing
+        # from a row by row list of the empty checkerboard cells.
+        empty = self.board.empty_mask() & checkerboard_mask(self.board.width, self.board.height)
+        # Choose a random cell from the mask and return it.
+        index = nth_bit(empty, self.rng.randrange(empty.bit_count()))
+        return self.board.position(index)
 
 
     def on_miss(self, position):
@@ -100,8 +178,10 @@ class BattleshipHunter:
         # Task 3.1:
 
         # Update the board with the miss.
-        x, y = position
-        self.board[y][x] = ShipCell.MISS
+        self.board.set(position, ShipCell.MISS)
+        for listener in self.miss_listeners:
+
+            listener(position)
         # Update total shots.
         self.total_shots += 1
 
@@ -120,14 +200,16 @@ class BattleshipHunter:
         # Task 3.2:
 
         # Update the board with the hit ship.
-        x, y = position
-        self.board[y][x] = ship
+        self.board.set(position, ship)
         # If the ship has been hit before, add the hit to it's entry.
         if ship in self.hits:
             self.hits[ship].append(position)
         # Otherwise, create a new entry for the newly discovered ship.
         else:
             self.hits[ship] = [position]
+        for listener in self.hit_listeners:
+
+            listener(ship, position)
         # Check if the ship needs to be sunk.
         if self.check_sink(ship):
             self.on_sink(ship)
@@ -148,10 +230,7 @@ class BattleshipHunter:
 
         # Return true if both x and y are on the board.
         x, y = position
-        return x >= 0 and y >= 0 and x < len(self.board[0]) and y < len(self.board)
-
-        # Remove after adding your implementation.
-        return False
+        return x >= 0 and y >= 0 and x < self.board.width and y < self.board.height
 
     def is_empty(self, position):
         """
@@ -165,8 +244,7 @@ class BattleshipHunter:
         # Task 4.2:
 
         # Return true if the cell is empty.
-        x, y = position
-        return self.board[y][x] == ShipCell.EMPTY
+        return not self.board.occupied & self.board.bit(position)
 
     def target_basic(self):
         """
@@ -222,6 +300,9 @@ class BattleshipHunter:
         self.hits.pop(ship)
         # Remove the ship from the ships dictionary.
         self.ships.pop(ship)
+        for listener in self.sink_listeners:
+
+            listener(ship)
         # Tell the game manager to sink the ship.
         self.game_manager.sink_ship(ship)
 
@@ -237,23 +318,16 @@ class BattleshipHunter:
         """
         # Task 6.1:
 
-        # Check horizontally.
-        # For all starting positions ((x - size + 1) to x).
-
-            # If all the cells of the ship are in bounds of the board and empty...
-
-                # Return result.
+        # The placement index lists every in-bounds horizontal and vertical placement of the ship
+        # that covers this cell. If any of them doesn't overlap a known cell, the ship can fit.
+        index = placement_index(self.board.width, self.board.height, size)
+        occupied = self.board.occupied
+        for placement in index.covering[self.board.index(position)]:
 
-        # Check vertically.
-        # For all starting positions((y - size + 1) to y).
-
-            # If all the cells of the ship are in bounds of the board and empty...
-
-                # Return result.
+            if not index.masks[placement] & occupied:
 
+                return True
         # If all other checks were not successful, then this ship cannot be in this cell.
-
-        # Remove after adding your implementation.
         return False
 
     def hunt_clusters(self):
@@ -269,50 +343,56 @@ class BattleshipHunter:
         """
         # Task 6.2
 
-        # Get the sizes of the remaining ships.
-
-        # Determine the maximum ship size using the max() function.
-
+        # Get the sizes of the remaining ships and determine the maximum ship size.
+        size = max(self.ships.values())
         # Gather empty cells that can hold a ship of the max ship size.
+        empty = fit_mask(self.board.empty_mask(), self.board.width, self.board.height, size)
+        # Choose a random cell from the mask and return it.
+        return self.board.position(nth_bit(empty, self.rng.randrange(empty.bit_count())))
 
-        # Choose a random cell from the list.
-
-        # Return the chosen cell.
-
-        # Remove after adding your implementation.
-        return (0, 0)
-
-    def get_space(self, position, orientation):
+    def get_space(self, position, orientation, ship=None):
         """
         Returns the number of adjacent positions in a particular orientation.
 
         Parameters:
             position (tuple): The position to check around.
             orientation (Orientation): The orientation to check for.
+            ship (ShipCell): A ship whose hit cells also count as space, or None.
         Returns:
             int: The number of adjacent positions in the given orientation.
         """
         # Task 7.1:
 
-        # Make a list of directions based on the orientation.
+        # The counter starts at 1 for the position itself. The nearest known cells on either side
+        # along the line (the row or column mask) bound the empty run around the position.
+        x, y = position
+        index = self.board.index(position)
+        if orientation == Orientation.HORIZONTAL:
+
+            line = line_mask(self.board.width, self.board.height, y, Orientation.HORIZONTAL)
+            step, before, after = 1, x, self.board.width - 1 - x
 
-        # Create a counter for the number of spaces available.
+        else:
 
-        # For each direction.
+            line = line_mask(self.board.width, self.board.height, x, Orientation.VERTICAL)
+            step, before, after = self.board.width, y, self.board.height - 1 - y
 
-            # Create a variable to keep track how far away we currently are from the starting
-            # position.
+        blocked = self.board.occupied & line
+        if ship is not None:
 
-            # While the position in that direction and distance away is in bounds and empty.
+            blocked &= ~self.board.masks.get(ship, 0)
 
-                # Increment the counter.
+        below = blocked & ((1 << index) - 1)
+        if below:
 
-                # Increment the distance.
+            before = (index - below.bit_length()) // step
 
-        # Return the counter.
+        above = blocked >> (index + 1)
+        if above:
 
-        # Remove after adding your implementation.
-        return 1
+            after = ((above & -above).bit_length() - 1) // step
+
+        return 1 + before + after
 
     def target_fit(self):
         """
@@ -323,25 +403,34 @@ class BattleshipHunter:
         adjacent cell and orientation.
 
         Returns:
-            tuple: The choice position of the next cell of the ship to target.
+            tuple: The choice position of the next cell of the ship to target, or None if no
+            discovered ship fits next to its hits.
         """
         # Task 7.2:
 
         # For each ship in the hits dictionary.
+        for ship, hits in self.hits.items():
 
             # For each hit on that ship.
+            for x, y in hits:
 
                 # For each adjacent direction to that cell.
+                for direction_x, direction_y in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
 
                     # Determine the adjacent cell in that direction.
-
+                    choice = (x + direction_x, y + direction_y)
                     # Determine whether the orientation would be HORIZONTAL or VERTICAL.
-
+                    orientation = Orientation.HORIZONTAL if direction_x else Orientation.VERTICAL
                     # If the adjacent cell can be targeted, and the ship can fit in that
-                    # orientation, return the cell.
+                    # orientation, return the cell. The ship's own hits count as space, since
+                    # the ship lies across them.
+                    if (self.in_bounds(choice) and self.is_empty(choice)
+                            and self.get_space(choice, orientation, ship) >= self.ships[ship]):
 
-        # Remove after adding your implementation.
-        return (0, 0)
+                        return choice
+
+        # No discovered ship fits next to its hits.
+        return None
 
     def target_directionally(self):
         """
@@ -359,28 +448,39 @@ class BattleshipHunter:
         # Task 8:
 
         # For each ship in the hits directory.
+        for hits in self.hits.values():
 
-            # If the ship has more than two hits on it.
+            # If the ship has two or more hits on it.
+            if len(hits) < 2:
 
-                # Get the positions of the first and second hits.
+                continue
 
-                # Calculate the direction of the ship using the sign() method.
+            # Get the positions of the first and second hits.
+            (first_x, first_y), (second_x, second_y) = hits[0], hits[1]
+            # Calculate the direction of the ship using the sign() method. Hits on one ship are
+            # always in a line, so only one of the two is non-zero.
+            direction_x = self.sign(second_x - first_x) if second_x != first_x else 0
+            direction_y = self.sign(second_y - first_y) if second_y != first_y else 0
+            # For each hit on the ship.
+            for x, y in hits:
 
-                # For each hit on the ship.
-
-                    # Determine the adjacent cell in the direction.
+                # Determine the adjacent cell in the direction.
+                choice = (x + direction_x, y + direction_y)
+                # If it can be hit, then return cell.
+                if self.in_bounds(choice) and self.is_empty(choice):
 
-                    # If it can be hit, then return cell.
+                    return choice
 
-                    # Otherwise, determine the adjacent cell in the negative direction.
+                # Otherwise, determine the adjacent cell in the negative direction.
+                choice = (x - direction_x, y - direction_y)
+                # If it can be hit, then return the cell.
+                if self.in_bounds(choice) and self.is_empty(choice):
 
-                    # If it can be hit, then return the cell.
+                    return choice
 
         # If we look through all the cells and cannot target a ship directionally (no ships have
         # two hits). Then use the size-based targeting algorithm.
-
-        # Remove after adding your implementation.
-        return (0, 0)
+        return self.target_fit()
 
     def sign(self, num):
         """
@@ -397,445 +497,5063 @@ class BattleshipHunter:
 
         return -1 if num < 0 else 1
 
-### Used to run the game, do not modify past this line! ###
-class ShipCell(Enum):
-    """Class that links ship cells to their board symbols and written names."""
-    EMPTY = ('~ ', 'Empty')
-    MISS = ('X ', 'Miss')
-    DESTROYER = ('D ', 'Destroyer')
-    SUBMARINE = ('S ', 'Submarine')
-    CRUISER = ('C ', 'Cruiser')
-    BATTLESHIP = ('B ', 'Battleship')
-    CARRIER = ('R ', 'Carrier')
 
-    def __init__(self, symbol, description):
+class PlacementDensity:
+    """
+    Counts, for every cell, the legal placements of the remaining ships that cover it.
 
-        self.symbol = symbol
-        self.description = description
+    A placement of a ship is legal while it covers no miss, no cell of another ship and every
+    hit on that ship. Counts are updated after each shot by removing only the placements that
+    cross the changed cell, instead of recounting the board.
+    """
 
+    def __init__(self, width, height, ships, rng):
 
-class Mode(Enum):
-    """Enum constant for the search mode of the BattleshipHunter."""
-    HUNTING = 0
-    TARGETING = 1
+        cells = width * height
+        # The random stream used to break ties.
+        self.rng = rng
+        # The shared placement index of each remaining ship.
+        self.indexes = {ship: placement_index(width, height, size) for ship, size in ships.items()}
+        # The ids of the legal placements of each remaining ship.
+        self.valid = {ship: set(range(len(index.masks))) for ship, index in self.indexes.items()}
+        # Per ship and total counts of legal placements covering each cell.
+        self.ship_counts = {}
+        self.counts = [0] * cells
+        for ship, index in self.indexes.items():
 
+            ship_counts = list(index.coverage)
+            self.ship_counts[ship] = ship_counts
+            self.counts = [total + count for total, count in zip(self.counts, ship_counts)]
 
-class Orientation(Enum):
-    """Enum constant for the orientation of the Battleship objects."""
-    HORIZONTAL = 0
-    VERTICAL = 1
+        # Ships that have been hit, whose legal placements must cover all of their hits.
+        self.found = set()
 
+    def remove(self, ship, placement):
+        """Removes a legal placement of a ship from the counts."""
+        self.valid[ship].discard(placement)
+        ship_counts = self.ship_counts[ship]
+        counts = self.counts
+        for cell in self.indexes[ship].cells[placement]:
 
-class Log:
-    """A helper class that provides static functions for outputting to the console and printing errors."""
+            ship_counts[cell] -= 1
+            counts[cell] -= 1
 
-    verbose = True
+    def exclude(self, cell, keep=None):
+        """Removes the placements of every ship except keep that cover cell."""
+        for ship, valid in self.valid.items():
 
-    @staticmethod
-    def log(message=""):
-        """
-        Prints a given message to the console.
+            if ship != keep:
 
-        Parameters:
-            message (str): The message to print.
-        """
-        if Log.verbose:
-            print(message)
+                for placement in self.indexes[ship].covering[cell]:
 
-    @staticmethod
-    def display_board(board, name):
+                    if placement in valid:
+
+                        self.remove(ship, placement)
+
+    def on_miss(self, cell):
+        """Updates the counts after a miss at cell."""
+        self.exclude(cell)
+
+    def on_hit(self, ship, cell):
+        """Updates the counts after ship is hit at cell."""
+        self.exclude(cell, ship)
+        covering = self.indexes[ship].covering[cell]
+        valid = self.valid[ship]
+        if ship in self.found:
+
+            # Only the few placements already through the earlier hits are left to filter.
+            for placement in [placement for placement in valid if placement not in covering]:
+
+                self.remove(ship, placement)
+
+            return
+
+        # On the first hit, drop the ship's counts wholesale and add back the placements
+        # crossing the hit.
+        self.found.add(ship)
+        self.clear(ship)
+        kept = {placement for placement in covering if placement in valid}
+        self.valid[ship] = kept
+        ship_counts = self.ship_counts[ship]
+        for placement in kept:
+
+            for covered in self.indexes[ship].cells[placement]:
+
+                ship_counts[covered] += 1
+                self.counts[covered] += 1
+
+    def on_sink(self, ship):
+        """Removes a sunk ship from the counts."""
+        self.clear(ship)
+        self.found.discard(ship)
+        del self.valid[ship]
+        del self.ship_counts[ship]
+        del self.indexes[ship]
+
+    def clear(self, ship):
+        """Subtracts all of a ship's counts from the totals and zeroes them."""
+        ship_counts = self.ship_counts[ship]
+        self.counts = [total - count for total, count in zip(self.counts, ship_counts)]
+        self.ship_counts[ship] = [0] * len(ship_counts)
+
+    def best_cell(self):
+        """Returns a random cell among those with the highest total count."""
+        counts = self.counts
+        best = max(counts)
+        return self.rng.choice([cell for cell, count in enumerate(counts) if count == best])
+
+    def best_target(self, hits, occupied):
         """
-        Prints a given board in the console in a nice format.
+        Finds the empty cell covered by the most placements of the ships in hits.
 
         Parameters:
-            board (List[List[ShipCell]): A 2D list of the board.
-            name (str): The name of the 'owner' of the board (such as "GAME", "HUNTER", etc).
+            hits (dict): The ships that have been hit but not sunk.
+            occupied (int): The mask of known cells, which can't be chosen.
+        Returns:
+            int: The cell, or None if there is no candidate.
         """
-        if Log.verbose:
+        counts = {}
+        for ship in hits:
 
-            print("\n" + "-" * 28)
-            print("\t\t " + name + " BOARD")
-            print("-" * 28)
-            for row in board:
-                print(" ".join(cell.symbol for cell in row))
+            placements = self.indexes[ship].cells
+            for placement in self.valid[ship]:
 
-            print("-" * 28)
+                for cell in placements[placement]:
 
-class GameManager:
-    """Main game manager class."""
+                    if not occupied >> cell & 1:
 
-    def __init__(self):
+                        counts[cell] = counts.get(cell, 0) + 1
 
-        self.ships = {
-            ShipCell.DESTROYER: Battleship("Destroyer", 2),
-            ShipCell.SUBMARINE: Battleship("Submarine", 3),
-            ShipCell.CRUISER: Battleship("Cruiser", 3),
-            ShipCell.BATTLESHIP: Battleship("Battleship", 4),
-            ShipCell.CARRIER: Battleship("Carrier", 5)
-        }
-        self.shots_hit = []
-        self.total_shots = []
-        self.accuracies = []
-        self.hunt_fallbacks = []
-        self.display = True
-        self.manual = True
+        if not counts:
 
-        Log.verbose = False
+            return None
 
-        self.ui = GameUI(self)
-        self.game_num = 1
+        return max(counts, key=counts.get)
 
-        self.run_game()
 
-        # For accuracy testing.
-        """for i in range(1000):
+# Hunt and target policies by name. Each entry is a HuntPolicy or TargetPolicy subclass, created once per hunter.
+HUNT_POLICIES = {}
+TARGET_POLICIES = {}
 
-            self.run_game()
-            self.game_num += 1
 
-        print()
-        print("Average Shots Hit: " + str(round(sum(self.shots_hit) / len(self.shots_hit), 4)))
-        print("Average Total Shots: " + str(round(sum(self.total_shots) / len(self.total_shots), 4)))
-        print("Average Accuracy: " + str(round(sum(self.accuracies) / len(self.accuracies), 4)))
-        print("Average Hunt Fallbacks: " + str(round(sum(self.hunt_fallbacks) / len(self.hunt_fallbacks) * 100, 4)))"""
+def register_hunt(name):
+    """
+    Returns a class decorator that registers a HuntPolicy subclass as a hunt policy.
 
-    def run_game(self):
-        """Runs a single game of battleship."""
-        # Place the ships on the board.
-        self.place_ships()
-        # Initialize the hunter.
-        self.battleship_hunter = BattleshipHunter(self)
+    Parameters:
+        name (str): The name the policy is selected by.
+    Returns:
+        function: The decorator, which returns the class unchanged.
+    Raises:
+        TypeError: From the decorator, if the class isn't a HuntPolicy or leaves hunt() abstract.
+    """
+    def register(policy):
 
-        Log.display_board(self.board, "GAME")
-        # Main game loop.
-        while self.ships_left() > 0:
-            # Get the hunter's choice.
-            call = self.battleship_hunter.take_turn()
-            # If display is active, show on screen.
-            if self.display:
+        if not issubclass(policy, HuntPolicy) or policy.__abstractmethods__:
 
-                self.ui.run()
-                time.sleep(0.04)
-            # Check if the shot hit.
-            result = self.check_hit(call)
-            if result != ShipCell.MISS:
+            raise TypeError(policy.__name__ + " is registered as a hunt policy but doesn't implement hunt()")
 
-                self.battleship_hunter.on_hit(result, call)
+        HUNT_POLICIES[name] = policy
+        return policy
 
-            else:
+    return register
 
-                self.battleship_hunter.on_miss(call)
 
-            Log.log()
-            Log.display_board(self.board, "GAME")
-            Log.log("Ships Left: " + str(self.ships_left()))
-            # If manual is active, wait for the user's input.
-            if self.manual:
+def register_target(name):
+    """
+    Returns a class decorator that registers a TargetPolicy subclass as a target policy.
 
-                self.ui.get_next()
-        # If display is active, show on screen one last time at the end of the game.
-        if self.display:
+    Parameters:
+        name (str): The name the policy is selected by.
+    Returns:
+        function: The decorator, which returns the class unchanged.
+    Raises:
+        TypeError: From the decorator, if the class isn't a TargetPolicy or leaves target() abstract.
+    """
+    def register(policy):
 
-            self.ui.run()
-            if not self.manual:
+        if not issubclass(policy, TargetPolicy) or policy.__abstractmethods__:
 
-                time.sleep(1.25)
+            raise TypeError(policy.__name__ + " is registered as a target policy but doesn't implement target()")
 
-        print(f"Game #{self.game_num} finished!")
-        # Trigger the game over sequence.
-        self.game_over()
-        # If manual is active, wait until the user presses a button to continue to the next game.
-        if self.manual:
+        TARGET_POLICIES[name] = policy
+        return policy
 
-            self.ui.get_next()
+    return register
 
-    def ships_left(self):
-        """
-        Counts the number of ships that have not sunk.
 
-        Returns:
-            int: The number of ships left.
-        """
-        return sum(1 for ship_cell, ship in self.ships.items() if not ship.sunk)
+def split_strategy(strategy):
+    """
+    Splits a strategy name into its hunt and target policy names and its endgame option.
 
-    def can_place(self, ship):
-        """
-        Checks if a ship can be placed.
+    Parameters:
+        strategy (str): A hunt policy name, optionally followed by ":" and a target policy name,
+            and then optionally by "+endgame".
+    Returns:
+        tuple: The hunt and target policy names, and whether to use the EndgameSolver.
+    Raises:
+        ValueError: If either policy is not registered.
+    """
+    endgame = strategy.endswith("+endgame")
+    if endgame:
 
-        Parameters:
-            ship (Battleship): The ship to be placed. Contains the position and orientation of the ship.
-        Returns:
-            bool: True if the ship can be placed, False otherwise.
-        """
+        strategy = strategy[:-len("+endgame")]
 
-        dx, dy = (int(ship.orientation == Orientation.HORIZONTAL), int(ship.orientation == Orientation.VERTICAL))
-        for i in range(ship.size):
+    hunt_name, _, target_name = strategy.partition(":")
+    if not target_name:
 
-            nx, ny = ship.position[0] + dx * i, ship.position[1] + dy * i
-            # Check bounds or overlapping ship
-            if not (0 <= nx < 10 and 0 <= ny < 10) or self.board[ny][nx] != ShipCell.EMPTY:
+        target_name = hunt_name if hunt_name in TARGET_POLICIES else "basic"
 
-                return False
+    if hunt_name not in HUNT_POLICIES:
 
-        return True
+        raise ValueError("no hunt policy " + repr(hunt_name) + ", choose from " +
+                         ", ".join(sorted(HUNT_POLICIES)))
 
-    def place_ship(self, ship, ship_cell):
-        """Places ship on the board at its position."""
-        dx, dy = (int(ship.orientation == Orientation.HORIZONTAL), int(ship.orientation == Orientation.VERTICAL))
-        for i in range(ship.size):
+    if target_name not in TARGET_POLICIES:
 
-            nx, ny = ship.position[0] + dx * i, ship.position[1] + dy * i
-            self.board[ny][nx] = ship_cell
+        raise ValueError("no target policy " + repr(target_name) + ", choose from " +
+                         ", ".join(sorted(TARGET_POLICIES)))
 
-    def place_ships(self):
-        """Generates the initial 10x10 game board and places all five ships."""
-        self.board = [[ShipCell.EMPTY for _ in range(10)] for _ in range(10)]
-        for ship_cell, ship in self.ships.items():
+    return hunt_name, target_name, endgame
 
-            placed = False
-            while not placed:
 
-                ship.set_orientation(random.choice(list(Orientation)))
-                ship.set_position((random.randint(0, 9), random.randint(0, 9)))
-                if self.can_place(ship):
+def strategy_names():
+    """
+    Returns every "hunt:target" combination of the registered policies.
 
-                    self.place_ship(ship, ship_cell)
-                    ship.hits = 0
-                    ship.sunk = False
-                    placed = True
+    Returns:
+        list: The strategy names, sorted.
+    """
+    return sorted(hunt + ":" + target for hunt in HUNT_POLICIES for target in TARGET_POLICIES)
 
-    def check_hit(self, position):
+
+class HunterPolicy(ABC):
+    """
+    Base class for pluggable hunt and target policies.
+
+    A policy is created once for each hunter, when the hunter's strategy is set. A hunt policy
+    derives from HuntPolicy and provides hunt(), a target policy derives from TargetPolicy and
+    provides target(), both returning a position, and target() may return None to fall back to
+    hunting. The decorators that register a policy reject a class missing its method, so the
+    mistake shows when the module loads rather than in the middle of a game. The on_miss, on_hit
+    and on_sink callbacks run after the hunter has recorded a shot, but only when a subclass
+    overrides them.
+    """
+
+    def __init__(self, hunter):
+
+        self.hunter = hunter
+
+    def on_miss(self, position):
         """
-        Checks if position would hit a ship.
+        Updates the policy after a miss.
 
         Parameters:
-            position (tuple): The position to check for a hit.
-        Returns:
-            ShipCell: The ID of the ShipCell hit.
+            position (tuple): The position of the miss.
         """
-        Log.log(str(self.board[0][0]))
-        if self.board[position[1]][position[0]] != ShipCell.EMPTY:
 
-            return self.board[position[1]][position[0]]
+    def on_hit(self, ship, position):
+        """
+        Updates the policy after a hit.
 
-        return ShipCell.MISS
+        Parameters:
+            ship (ShipCell): The ship that was hit.
+            position (tuple): The position that the ship was hit at.
+        """
 
-    def sink_ship(self, ship):
+    def on_sink(self, ship):
         """
-        Sinks a ship.
+        Updates the policy after a ship sinks.
 
         Parameters:
-            ship (ShipCell): The key of the ship that has sunk.
+            ship (ShipCell): The ship that has sunk.
         """
-        self.ships[ship].set_sunk(True)
 
-    def game_over(self):
-        """Updates the overall stats after completing a game."""
-        Log.log("Game Over!")
-        Log.display_board(self.battleship_hunter.board, "HUNTER")
-        Log.display_board(self.board, "GAME")
-        Log.log()
-        Log.log("Accuracy: " + str(self.battleship_hunter.shots_hit) + " / " + str(self.battleship_hunter.total_shots) +
-                " (" + str(round(float(self.battleship_hunter.shots_hit) /
-                                 float(self.battleship_hunter.total_shots) *
-                                 100, 2)) + "%)")
-        self.shots_hit.append(self.battleship_hunter.shots_hit)
-        self.total_shots.append(self.battleship_hunter.total_shots)
-        self.accuracies.append(float(self.battleship_hunter.shots_hit) /
-                               float(self.battleship_hunter.total_shots) * 100)
 
+class HuntPolicy(HunterPolicy):
+    """Base class for hunt policies."""
 
-class GameUI:
-    """Class that manages the UI display of the game, including the Battleship board and stats."""
+    @abstractmethod
+    def hunt(self):
+        """
+        Returns:
+            tuple: The position to fire at while no discovered ship is left.
+        """
 
-    def __init__(self, _game_manager):
 
-        pygame.init()
-        self.screen = pygame.display.set_mode((800, 600))
-        pygame.display.set_caption("Battleship")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        self.cell_size = 40  # Size of each grid cell
-        self.margin = 50  # Margin around the grid
-        self.game_manager = _game_manager
-        # Colors for each ShipCell.
-        self.colors = {
-            ShipCell.EMPTY: (250, 250, 250),  # Light Grey
-            ShipCell.MISS: (50, 50, 50),  # Dark Grey
-            ShipCell.DESTROYER: (0, 200, 0),  # Green
-            ShipCell.CARRIER: (0, 0, 200),  # Blue
-            ShipCell.CRUISER: (200, 0, 200),  # Purple
-            ShipCell.BATTLESHIP: (0, 200, 200),  # Teal
-            ShipCell.SUBMARINE: (200, 200, 0)  # Yellow
-        }
+class TargetPolicy(HunterPolicy):
+    """Base class for target policies."""
 
-    def draw_board(self, board):
-        """Draws the board and fills in the cells."""
-        for y, row in enumerate(board):
+    @abstractmethod
+    def target(self):
+        """
+        Returns:
+            tuple: The position to fire at while ships are hit but not sunk, or None.
+        """
 
-            for x, cell in enumerate(row):
 
-                rect = pygame.Rect(
-                    self.margin + x * self.cell_size,
-                    self.margin + 20 + y * self.cell_size,
-                    self.cell_size,
-                    self.cell_size
-                )
-                # Sets the color of this cell and draws it.
-                color = self.colors[cell]
-                pygame.draw.rect(self.screen, color, rect)
-                pygame.draw.rect(self.screen, (0, 0, 0), rect, 1)  # Black grid lines
-
-    def draw_stats(self):
-        """Displays game stats."""
-        # Draw the game number.
-        text = self.font.render(f"Game #{self.game_manager.game_num}", True, (255, 255, 255))
-        self.screen.blit(text, (10, 10))
-        # Draw the stats.
-        text = self.font.render(
-            f"Shots: {self.game_manager.battleship_hunter.total_shots} | " +
-            f"Hits: {self.game_manager.battleship_hunter.shots_hit} | " +
-            f"Accuracy: {round((self.game_manager.battleship_hunter.shots_hit / max(1, self.game_manager.battleship_hunter.total_shots)) * 100, 2)}%",
-            True,
-            (255, 255, 255)
-        )
-        self.screen.blit(text, (10, 40))
+@register_hunt("basic")
+class CheckerboardHunt(HuntPolicy):
+    """Hunts at random cells of the checkerboard, using BattleshipHunter.hunt_basic."""
 
-    def handle_events(self):
-        """Handles user input."""
-        for event in pygame.event.get():
+    def hunt(self):
+        """Hunts with BattleshipHunter.hunt_basic."""
+        return self.hunter.hunt_basic()
 
-            if event.type == pygame.KEYDOWN:
 
-                if event.key == pygame.K_ESCAPE:
+@register_hunt("clusters")
+class ClusterHunt(HuntPolicy):
+    """Hunts at random cells that fit the largest ship left, using BattleshipHunter.hunt_clusters."""
 
-                    pygame.quit()
-                    sys.exit()
+    def hunt(self):
+        """Hunts with BattleshipHunter.hunt_clusters."""
+        return self.hunter.hunt_clusters()
 
-                elif event.key == pygame.K_m:
 
-                    self.game_manager.manual = not self.game_manager.manual
+@register_target("basic")
+class AdjacentTarget(TargetPolicy):
+    """Targets the first empty cell next to the first discovered ship."""
 
-            if event.type == pygame.QUIT:
+    def target(self):
+        """Targets with BattleshipHunter.target_basic."""
+        return self.hunter.target_basic()
 
-                pygame.quit()
-                sys.exit()
 
-    def display(self):
-        """Updates the screen with the current board and stats."""
-        self.screen.fill((0, 0, 0))  # Clear the screen
-        self.draw_board(self.game_manager.battleship_hunter.board)
-        self.draw_stats()
-        pygame.display.flip()
+@register_target("fit")
+class FitTarget(TargetPolicy):
+    """Targets empty cells next to a discovered ship that the ship could still extend into."""
 
-    def run(self):
-        """Takes user input and updates the screen as needed."""
-        self.handle_events()
-        self.display()
-        self.clock.tick(60)
+    def target(self):
+        """Targets with BattleshipHunter.target_fit."""
+        return self.hunter.target_fit()
 
-    def get_next(self):
-        """Awaits user input before moving on to the next step in the game."""
-        next_input = False
-        while not next_input:
 
-            for event in pygame.event.get():
+@register_target("directional")
+class DirectionalTarget(TargetPolicy):
+    """Targets along the line of ships hit twice or more, otherwise like FitTarget."""
 
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+    def target(self):
+        """Targets with BattleshipHunter.target_directionally."""
+        return self.hunter.target_directionally()
 
-                if event.type == pygame.KEYDOWN:
 
-                    if event.key == pygame.K_ESCAPE:
+@register_hunt("density")
+@register_target("density")
+class DensityPolicy(HuntPolicy, TargetPolicy):
+    """
+    Fires at the cell covered by the most legal placements of the remaining ships.
 
-                        pygame.quit()
-                        sys.exit()
+    The placement counts are kept in a PlacementDensity, updated from the shot callbacks. The
+    same instance serves as hunt and target policy when both are "density".
+    """
 
-                    elif event.key == pygame.K_m:
+    def __init__(self, hunter):
 
-                        self.game_manager.manual = not self.game_manager.manual
-                        return
+        super().__init__(hunter)
+        self.board = hunter.board
+        self.density = PlacementDensity(self.board.width, self.board.height, hunter.ships, hunter.rng)
 
-                    else:
+    def hunt(self):
+        """
+        Hunts for undiscovered ships by firing at the cell covered by the most legal placements
+        of the remaining ships.
 
-                        next_input = True
+        Returns:
+            tuple: The choice position of the cell to hunt.
+        """
+        return self.board.position(self.density.best_cell())
 
-class Battleship:
-    """Battleship class to hold the orientation, position, and status of ships on the board."""
+    def target(self):
+        """
+        Targets discovered ships by firing at the empty cell covered by the most placements of
+        the ships that have been hit but not sunk.
 
-    def __init__(self, name, size):
-        self.name = name
-        self.size = size
-        self.orientation = Orientation.HORIZONTAL
-        self.position = (0, 0)
-        self.hits = 0
-        self.sunk = False
+        Returns:
+            tuple: The choice position of the next cell of the ship to target, or None if no
+            placement of a hit ship is left.
+        """
+        index = self.density.best_target(self.hunter.hits, self.board.occupied)
+        return None if index is None else self.board.position(index)
 
-    def get_sunk(self):
+    def on_miss(self, position):
+        """Removes the placements covering the miss from the counts."""
+        self.density.on_miss(self.board.index(position))
+
+    def on_hit(self, ship, position):
+        """Keeps only the placements consistent with the hit in the counts."""
+        self.density.on_hit(ship, self.board.index(position))
+
+    def on_sink(self, ship):
+        """Removes the sunk ship from the counts."""
+        self.density.on_sink(ship)
+
+@register_hunt("lattice")
+class LatticeHunt(HuntPolicy):
+    """
+    Hunts on the lattice of cells with (x + y) % k == offset, where k is the length of the
+    smallest ship left.
+
+    While the destroyer is afloat this is a checkerboard, but once only ships of 3 or more are
+    left, only every third cell needs to be fired at, and so on. Of the k offsets, the one whose
+    empty cells are covered by the most open placements of the remaining ships is used. The
+    candidate cells are a mask kept up to date by the shot callbacks, and are only rebuilt when a
+    sinking changes the smallest ship, so a turn doesn't scan the board.
+    """
+
+    def __init__(self, hunter):
+
+        super().__init__(hunter)
+        self.board = hunter.board
+        self.step = None
+        self.candidates = 0
+        self.update_lattice()
+
+    def update_lattice(self):
+        """Picks the lattice for the smallest remaining ship and rebuilds the candidate cells."""
+        ships = self.hunter.ships
+        if not ships:
+
+            return
+
+        self.step = min(ships.values())
+        board = self.board
+        empty = board.empty_mask()
+        # Each open placement of a remaining ship adds one to every empty lattice cell it covers.
+        # As in fit_mask, the open placements are found as the start cells of runs of empty
+        # cells, and a run starting at a cell covers the lattice cell i along when the start is
+        # on the lattice shifted back by i.
+        width = board.width
+        lattices = [lattice_mask(width, board.height, self.step, offset) for offset in range(self.step)]
+        sums = [0] * self.step
+        for size in ships.values():
+
+            horizontal = empty & start_mask(width, board.height, size)
+            vertical = empty
+            for i in range(1, size):
+
+                horizontal &= empty >> i
+                vertical &= empty >> (i * width)
+
+            for offset, lattice in enumerate(lattices):
+
+                for i in range(size):
+
+                    sums[offset] += ((horizontal & (lattice >> i)).bit_count() +
+                                     (vertical & (lattice >> (i * width))).bit_count())
+
+        # Break ties at random, so the lattice can't be predicted.
+        best = max(sums)
+        offset = self.hunter.rng.choice([offset for offset, total in enumerate(sums) if total == best])
+        self.candidates = empty & lattices[offset]
+
+    def hunt(self):
         """
-        Gets whether the ship is sunk or not.
+        Hunts for undiscovered ships by firing at a random lattice cell that the smallest
+        remaining ship still fits in.
 
         Returns:
-            bool: The value of the sunk variable.
+            tuple: The choice position of the cell to hunt.
         """
-        return self.sunk
+        hunter = self.hunter
+        while self.candidates:
 
-    def set_sunk(self, sunk):
+            index = nth_bit(self.candidates, hunter.rng.randrange(self.candidates.bit_count()))
+            position = self.board.position(index)
+            # Cells the smallest ship can no longer fit in are dropped as they are drawn.
+            if hunter.can_fit_ship(position, self.step):
+
+                return position
+
+            self.candidates &= ~(1 << index)
+
+        # Hits on ships that aren't sunk can leave no lattice cell open, so fall back to any
+        # empty cell a ship fits in.
+        empty = fit_mask(self.board.empty_mask(), self.board.width, self.board.height, self.step)
+        empty = empty or self.board.empty_mask()
+        return self.board.position(nth_bit(empty, hunter.rng.randrange(empty.bit_count())))
+
+    def on_miss(self, position):
+        """Drops the missed cell from the candidates."""
+        self.candidates &= ~self.board.bit(position)
+
+    def on_hit(self, ship, position):
+        """Drops the hit cell from the candidates."""
+        self.candidates &= ~self.board.bit(position)
+
+    def on_sink(self, ship):
+        """Rebuilds the lattice if the sinking changed the smallest ship left."""
+        if self.hunter.ships and min(self.hunter.ships.values()) != self.step:
+
+            self.update_lattice()
+
+
+@register_hunt("montecarlo")
+@register_target("montecarlo")
+class MonteCarloPolicy(HuntPolicy, TargetPolicy):
+    """
+    Fires at the cell occupied in the most of a pool of sampled fleet configurations.
+
+    A configuration is one legal placement for each remaining ship, with no two overlapping, so
+    unlike DensityPolicy's per-ship counts it accounts for how the ships crowd each other, and
+    it never enumerates the joint placements, which grow too fast on large boards. Samples are
+    drawn by rejection: each ship's placement is drawn from its legal ones, and the draw starts
+    over at the first overlap, so every fresh configuration is equally likely. The pool is kept
+    across turns. A shot only sets aside the samples it makes illegal, and those are repaired at
+    the next turn by redrawing just the placements the shot broke, before fresh samples top the
+    pool back up. A repaired sample keeps its other placements, so it is drawn only
+    approximately uniformly: configurations near the ones already in the pool are favoured. In
+    games this costs no measurable accuracy, and it halves the time of a turn.
+
+    Each turn stops drawing after max_draws draws and fires on what it has, which bounds the
+    turn's work the same way on every machine, so seeded games can be repeated. A time_budget
+    also stops drawing after that many seconds, but then the samples, and so the shots, depend
+    on the machine's speed and load, and a seed no longer repeats a game. The same instance
+    serves as hunt and target policy.
+    """
+
+    # The samples to keep in the pool, and the most seconds a turn spends drawing them, or None
+    # for no time limit. Set from the command line by --samples and --turn-budget.
+    samples = 500
+    time_budget = None
+    # The most draws and repairs in a turn, which bounds a turn's work without a clock.
+    max_draws = 10000
+    # The most redraws tried to repair one broken sample before it is dropped.
+    repair_tries = 8
+
+    def __init__(self, hunter):
+
+        super().__init__(hunter)
+        self.board = hunter.board
+        # The remaining ships, in the order of each sample's placements.
+        self.fleet = list(hunter.ships)
+        # The placement masks of each remaining ship that are legal: clear of every known cell
+        # but its own hits, and covering all of them.
+        self.candidates = [list(placement_index(self.board.width, self.board.height, size).masks)
+                           for size in hunter.ships.values()]
+        # The legal samples, each the union of its placements and a tuple of them, one per ship.
+        self.pool = []
+        # The samples made illegal since the last turn, each a list of placements with None for
+        # the ones that have to be redrawn.
+        self.broken = []
+
+    def hunt(self):
         """
-        Updates the sunk variable of the ship to a boolean value.
+        Tops up the pool of sampled configurations and fires at the empty cell most of them
+        occupy.
+
+        Returns:
+            tuple: The choice position of the cell to fire at.
+        """
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        draws = self.repair(deadline)
+        self.draw(draws, deadline)
+        occupied = self.board.occupied
+        counts = cell_counts([union & ~occupied for union, _ in self.pool])
+        if not counts:
+
+            # No sample was drawn in time, so fall back to each ship's legal placements on
+            # their own, as DensityPolicy counts them.
+            counts = cell_counts([mask & ~occupied for masks in self.candidates for mask in masks])
+
+        best = max(counts.values())
+        index = self.hunter.rng.choice([index for index, count in counts.items() if count == best])
+        return self.board.position(index)
+
+    target = hunt
+
+    def repair(self, deadline):
+        """
+        Redraws the broken placements of the samples set aside since the last turn.
 
         Parameters:
-            sunk (bool): The new value for the sunk variable.
+            deadline (float): The perf_counter() time to stop at, or None.
+        Returns:
+            int: The number of draws made.
         """
+        rng = self.hunter.rng
+        draws = 0
+        broken, self.broken = self.broken, []
+        for masks in broken:
 
-        self.sunk = sunk
+            if draws >= self.max_draws or deadline is not None and time.perf_counter() > deadline:
 
-    def get_orientation(self):
+                break
+
+            kept = 0
+            for mask in masks:
+
+                if mask is not None:
+
+                    kept |= mask
+
+            missing = [ship for ship, mask in enumerate(masks) if mask is None]
+            for _ in range(self.repair_tries):
+
+                draws += 1
+                union = kept
+                for ship in missing:
+
+                    candidates = self.candidates[ship]
+                    mask = candidates[rng.randrange(len(candidates))]
+                    if mask & union:
+
+                        break
+
+                    masks[ship] = mask
+                    union |= mask
+
+                else:
+
+                    self.pool.append((union, tuple(masks)))
+                    break
+
+        return draws
+
+    def draw(self, draws, deadline):
         """
-        Gets the orientation of the ship.
+        Draws fresh samples until the pool is full, or the turn runs out of draws or time.
+
+        Parameters:
+            draws (int): The draws already made this turn.
+            deadline (float): The perf_counter() time to stop at, or None.
+        """
+        rng = self.hunter.rng
+        candidates = self.candidates
+        # Drawing the ships with the fewest placements first finds most overlaps sooner.
+        order = sorted(range(len(candidates)), key=lambda ship: len(candidates[ship]))
+        masks = [0] * len(candidates)
+        while len(self.pool) < self.samples and draws < self.max_draws:
+
+            if deadline is not None and time.perf_counter() > deadline:
+
+                break
+
+            draws += 1
+            union = 0
+            for ship in order:
+
+                ship_candidates = candidates[ship]
+                mask = ship_candidates[rng.randrange(len(ship_candidates))]
+                if mask & union:
+
+                    break
+
+                masks[ship] = mask
+                union |= mask
+
+            else:
+
+                self.pool.append((union, tuple(masks)))
+
+    def invalidate(self, bit, hit=None):
+        """
+        Drops the placements a shot makes illegal, and sets aside the samples using them.
+
+        Parameters:
+            bit (int): The mask of the cell fired at.
+            hit (int): The position in fleet of the ship hit, or None for a miss.
+        """
+        for ship, candidates in enumerate(self.candidates):
+
+            covers = ship == hit
+            self.candidates[ship] = [mask for mask in candidates if bool(mask & bit) == covers]
+
+        # A sample stays legal after a miss if it doesn't cover the cell, and after a hit if the
+        # ship hit covers it.
+        pool = []
+        for sample in self.pool:
+
+            union, masks = sample
+            if not union & bit if hit is None else masks[hit] & bit:
+
+                pool.append(sample)
+
+            else:
+
+                self.broken.append(list(masks))
+
+        self.pool = pool
+        for masks in self.broken:
 
+            for ship, mask in enumerate(masks):
+
+                if mask is not None and bool(mask & bit) != (ship == hit):
+
+                    masks[ship] = None
+
+    def on_miss(self, position):
+        """Sets aside the samples that cover the miss."""
+        self.invalidate(self.board.bit(position))
+
+    def on_hit(self, ship, position):
+        """Sets aside the samples that don't put the ship hit on the cell."""
+        self.invalidate(self.board.bit(position), self.fleet.index(ship))
+
+    def on_sink(self, ship):
+        """Drops the sunk ship from the pool."""
+        # Every legal sample has the sunk ship where it was found, so it is just dropped.
+        sunk = self.fleet.index(ship)
+        del self.fleet[sunk]
+        del self.candidates[sunk]
+        for i, (union, masks) in enumerate(self.pool):
+
+            self.pool[i] = (union & ~masks[sunk], masks[:sunk] + masks[sunk + 1:])
+
+        for masks in self.broken:
+
+            del masks[sunk]
+
+
+def cell_counts(masks):
+    """
+    Counts the masks that have each bit set.
+
+    Parameters:
+        masks (list): The masks to count.
+    Returns:
+        dict: Maps the bit index of every bit set in some mask to its count.
+    """
+    # Add the masks up as binary numbers held one bit per mask, like a ripple carry adder run on
+    # every cell at once: planes[i] holds bit i of each cell's count.
+    planes = []
+    for carry in masks:
+
+        for plane, bits in enumerate(planes):
+
+            planes[plane] = bits ^ carry
+            carry &= bits
+            if not carry:
+
+                break
+
+        if carry:
+
+            planes.append(carry)
+
+    counts = {}
+    for plane, bits in enumerate(planes):
+
+        while bits:
+
+            index = (bits & -bits).bit_length() - 1
+            counts[index] = counts.get(index, 0) + (1 << plane)
+            bits &= bits - 1
+
+    return counts
+
+
+class EndgameSolver:
+    """
+    Plays the end of a game from the exact set of fleet configurations left.
+
+    Once at most max_ships ships remain and their joint placements consistent with the hunter's
+    board number at most max_configs, all of them are enumerated, each taken as equally likely.
+    With at most exact_configs of them, the shot that minimizes the expected number of shots left
+    is found by searching the shots and their results. Solved boards go in a transposition table
+    keyed by the board's masks, which is shared by every hunter with the same board size and
+    fleet, so a board met again, in the same game or a later one, costs a lookup. The search
+    solves at most max_nodes new boards per turn, which bounds the turn's time. Larger sets, and
+    turns that run out, fire at the cell covered by the most configurations instead.
+    """
+
+    def __init__(self, width, height, fleet, max_ships=3, max_configs=1024, exact_configs=8,
+                 max_nodes=300, max_entries=1 << 18):
+
+        self.width = width
+        self.height = height
+        # The ship cells in fleet order, as the hunter's ships dict holds them.
+        self.fleet = fleet
+        self.max_configs = max_configs
+        self.exact_configs = exact_configs
+        self.max_ships = max_ships
+        self.max_nodes = max_nodes
+        self.max_entries = max_entries
+        # Maps a board key to the expected shots left and the bit index of the best shot.
+        self.table = {}
+        # The boards solved so far this turn.
+        self.nodes = 0
+
+    def choose(self, hunter):
+        """
+        Returns the best shot for the hunter's board, if the board is small enough to solve.
+
+        Parameters:
+            hunter (BattleshipHunter): The hunter to choose for.
         Returns:
-            Orientation: The orientation enum value of the orientation variable.
+            tuple: The position to fire at, or None if the endgame hasn't been reached.
         """
+        if len(hunter.ships) > self.max_ships:
 
-        return self.orientation
+            return None
 
-    def set_orientation(self, orientation):
+        board = hunter.board
+        remaining = list(hunter.ships.items())
+        # Each remaining ship's placements: clear of every known cell but its own hits, and
+        # covering all of them. Their product bounds the joint placements.
+        candidates = []
+        total = 1
+        for cell, size in remaining:
+
+            own = board.masks.get(cell, 0)
+            blocked = board.occupied & ~own
+            masks = [mask for mask in placement_index(self.width, self.height, size).masks
+                     if not mask & blocked and mask & own == own]
+            total *= len(masks)
+            if total > self.max_configs:
+
+                return None
+
+            candidates.append(masks)
+
+        configs = []
+        self.enumerate(candidates, 0, 0, (), configs)
+        if not configs:
+
+            return None
+
+        sunk = tuple(board.masks.get(cell, 0) for cell in self.fleet if cell not in hunter.ships)
+        hits = tuple(board.masks.get(cell, 0) for cell, _ in remaining)
+        if len(self.table) >= self.max_entries:
+
+            self.table.clear()
+
+        self.nodes = 0
+        solved = None
+        if len(configs) <= self.exact_configs:
+
+            solved = self.solve(configs, sunk, board.masks.get(ShipCell.MISS, 0), hits, board.occupied)
+
+        if solved is None:
+
+            index = max(self.coverage(configs, board.occupied).items(), key=lambda item: item[1])[0]
+
+        else:
+
+            index = solved[1]
+
+        return board.position(index)
+
+    def enumerate(self, candidates, ship, union, masks, configs):
         """
-        Updates the orientation variable of the ship either to HORIZONTAL or VERTICAL.
+        Collects every non-overlapping choice of one placement per remaining ship.
 
         Parameters:
-            orientation (Orientation): The new orientation of the ship.
+            candidates (list): The placement masks of each remaining ship.
+            ship (int): The ship to choose a placement for next.
+            union (int): The cells of the placements chosen so far.
+            masks (tuple): The placements chosen so far.
+            configs (list): Receives (union, masks) for every complete choice.
         """
-        self.orientation = orientation
+        if ship == len(candidates):
 
-    def get_position(self):
+            configs.append((union, masks))
+            return
+
+        for mask in candidates[ship]:
+
+            if not mask & union:
+
+                self.enumerate(candidates, ship + 1, union | mask, masks + (mask,), configs)
+
+    def coverage(self, configs, shot):
         """
-        Gets the position of the ship.
+        Counts the configurations covering each cell that hasn't been shot.
 
+        Parameters:
+            configs (list): The (union, masks) configurations.
+            shot (int): The mask of the cells fired at.
         Returns:
-            (tuple): The value of the position variable.
+            dict: Maps each bit index to its count.
         """
+        return cell_counts([union & ~shot for union, _ in configs])
 
-        return self.position
+    def solve(self, configs, sunk, misses, hits, shot):
+        """
+        Finds the expected shots left under the best play, and the shot that achieves it.
 
-    def set_position(self, position):
+        Parameters:
+            configs (list): The (union, masks) configurations consistent with the board.
+            sunk (tuple): The masks of the sunk ships, which only identify the board.
+            misses (int): The mask of the misses.
+            hits (tuple): The mask of the hits on each remaining ship.
+            shot (int): The mask of every cell fired at.
+        Returns:
+            tuple: The expected shots left and the bit index of the best shot, or None if the
+            turn's node budget ran out.
         """
-        Updates the position variable of the ship.
+        if len(configs) == 1:
+
+            # Only the one configuration is left, so every shot is at one of its cells.
+            rest = configs[0][0] & ~shot
+            return rest.bit_count(), (rest & -rest).bit_length() - 1
+
+        key = (sunk, misses, hits)
+        solved = self.table.get(key)
+        if solved is not None:
+
+            return solved
+
+        if self.nodes >= self.max_nodes:
+
+            return None
+
+        self.nodes += 1
+        count = len(configs)
+        counts = self.coverage(configs, shot)
+        # Each configuration needs at least its cells that haven't been shot, so a shot at a cell
+        # can't take fewer than 1 + (cells left - its coverage) / count shots on average. Cells
+        # are tried from the most covered, so once that bound reaches the best, so do the rest.
+        cells_left = sum((union & ~shot).bit_count() for union, _ in configs)
+        best = None
+        for index in sorted(counts, key=counts.get, reverse=True):
+
+            if best is not None and 1 + (cells_left - counts[index]) / count >= best[0]:
+
+                break
+
+            bit = 1 << index
+            groups = {}
+            for config in configs:
+
+                outcome = -1
+                if config[0] & bit:
+
+                    outcome = next(ship for ship, mask in enumerate(config[1]) if mask & bit)
+
+                groups.setdefault(outcome, []).append(config)
+
+            # A shot with the same result in every configuration tells nothing. If it is a hit, it
+            # has to be taken at some point anyway, and taking it later costs no more, so only
+            # shots that split the configurations are searched.
+            if len(groups) == 1:
+
+                continue
+
+            expected = 1
+            for outcome, group in groups.items():
+
+                if outcome < 0:
+
+                    result = self.solve(group, sunk, misses | bit, hits, shot | bit)
+
+                else:
+
+                    result = self.solve(group, sunk, misses, hits[:outcome] + (hits[outcome] | bit,) +
+                                        hits[outcome + 1:], shot | bit)
+
+                if result is None:
+
+                    return None
+
+                expected += len(group) / count * result[0]
+                if best is not None and expected >= best[0]:
+
+                    break
+
+            else:
+
+                best = (expected, index)
+
+        self.table[key] = best
+        return best
+
+
+@lru_cache(maxsize=None)
+def endgame_solver(width, height, fleet):
+    """Returns the EndgameSolver shared by hunters with this board size and fleet."""
+    return EndgameSolver(width, height, fleet)
+
+### Used to run the game, do not modify past this line! ###
+class ShipCell(Enum):
+    """Class that links ship cells to their board symbols and written names."""
+    EMPTY = ('~ ', 'Empty')
+    MISS = ('X ', 'Miss')
+    DESTROYER = ('D ', 'Destroyer')
+    SUBMARINE = ('S ', 'Submarine')
+    CRUISER = ('C ', 'Cruiser')
+    BATTLESHIP = ('B ', 'Battleship')
+    CARRIER = ('R ', 'Carrier')
+
+    def __init__(self, symbol, description):
+
+        self.symbol = symbol
+        self.description = description
+
+
+class Mode(Enum):
+    """Enum constant for the search mode of the BattleshipHunter."""
+    HUNTING = 0
+    TARGETING = 1
+    ENDGAME = 2
+
+
+class Orientation(Enum):
+    """Enum constant for the orientation of the Battleship objects."""
+    HORIZONTAL = 0
+    VERTICAL = 1
+
+
+class FleetCell:
+    """
+    A board cell for a ship that has no ShipCell of its own, such as a second destroyer or a
+    custom ship type. It has the same symbol, description and name attributes as a ShipCell.
+    """
+
+    def __init__(self, symbol, description, kind=None):
+
+        self.symbol = symbol
+        self.description = description
+        self.name = description.upper().replace(" ", "_")
+        # The standard ShipCell of the same type, if there is one (used for its color).
+        self.kind = kind
+
+    def __repr__(self):
+
+        return "FleetCell." + self.name
+
+
+class GameConfig:
+    """
+    The board dimensions and fleet of a game, shared by the GameManager, BattleshipHunter and
+    GameUI.
+
+    The fleet is a sequence of (name, size, count) entries, with distinct names, sizes and
+    counts of at least 1. A ship whose name is one of the standard ship types and has a count of
+    1 uses that ShipCell on the board; every other ship gets its own FleetCell.
+    """
+
+    STANDARD_FLEET = (
+        ("Destroyer", 2, 1),
+        ("Submarine", 3, 1),
+        ("Cruiser", 3, 1),
+        ("Battleship", 4, 1),
+        ("Carrier", 5, 1),
+    )
+
+    def __init__(self, width=10, height=10, fleet=STANDARD_FLEET):
+
+        self.width = width
+        self.height = height
+        self.fleet = tuple(fleet)
+        GameConfig.check_fleet(self.fleet)
+        # The cell, name and size of every ship, in placement order.
+        self.ships = []
+        # Only the ship types, so a ship can't be named after the empty or miss cells.
+        kinds = {cell.description: cell for cell in ShipCell if cell not in (ShipCell.EMPTY, ShipCell.MISS)}
+        for name, size, count in self.fleet:
+
+            if size > max(width, height):
+
+                raise ValueError(name + " of size " + str(size) + " doesn't fit on the board")
+
+            kind = kinds.get(name)
+            for number in range(1, count + 1):
+
+                if count == 1 and kind is not None:
+
+                    self.ships.append((kind, name, size))
+
+                else:
+
+                    ship_name = name if count == 1 else name + " " + str(number)
+                    symbol = (name[0] + str(number % 10)) if count > 1 else name[0] + " "
+                    self.ships.append((FleetCell(symbol, ship_name, kind), ship_name, size))
+
+        names = [name for ship_cell, name, size in self.ships]
+        if len(set(names)) != len(names):
+
+            raise ValueError("Every ship needs its own name, but the fleet names some twice: " +
+                             ", ".join(sorted({name for name in names if names.count(name) > 1})))
+
+    @staticmethod
+    def check_fleet(fleet):
+        """
+        Checks that a fleet has at least one ship, and that its entries have distinct names and
+        sizes and counts of at least 1.
 
         Parameters:
-            position (tuple): The new position.
+            fleet (tuple): The (name, size, count) fleet entries.
+        Raises:
+            ValueError: If an entry is invalid.
         """
-        self.position = position
+        if not fleet:
 
-    def hit(self):
-        """Adds to hits count and updates the sunk variable if necessary."""
-        self.hits += 1
-        if self.hits >= self.size:
-            self.sunk = True
+            raise ValueError("The fleet has no ships")
 
-# Entry point of the program.
-if __name__ == '__main__':
+        names = set()
+        for name, size, count in fleet:
+
+            if not name:
+
+                raise ValueError("Every ship in the fleet needs a name")
+
+            if name in names:
+
+                raise ValueError(name + " is in the fleet twice; give it a count instead, like " + name + ":" +
+                                 str(size) + "x2")
+
+            if size < 1:
+
+                raise ValueError(name + " has size " + str(size) + ", but ships need a size of at least 1")
+
+            if count < 1:
+
+                raise ValueError(name + " has count " + str(count) + ", but each entry needs at least 1 ship")
+
+            names.add(name)
+
+    @staticmethod
+    def parse_fleet(text):
+        """
+        Parses a fleet from text such as "Destroyer:2x3,Carrier:5", where each entry is a name,
+        a size and an optional count.
+
+        Parameters:
+            text (str): The fleet description.
+        Returns:
+            tuple: The (name, size, count) fleet entries.
+        Raises:
+            ValueError: If the text isn't a valid fleet.
+        """
+        fleet = []
+        for entry in text.split(","):
+
+            name, _, size = entry.strip().partition(":")
+            size, _, count = size.partition("x")
+            if not size:
+
+                raise ValueError('"' + entry.strip() + '" needs a size, like ' + (name or "Destroyer") + ":2")
+
+            fleet.append((name, int(size), int(count or 1)))
+
+        GameConfig.check_fleet(fleet)
+        return tuple(fleet)
+
+    def format_fleet(self):
+        """Returns the fleet in the text format read by parse_fleet()."""
+        return ",".join(name + ":" + str(size) + "x" + str(count) for name, size, count in self.fleet)
+
+
+def nth_bit(mask, n):
+    """
+    Finds the n-th lowest set bit of a mask by halving the mask until few bits remain.
+
+    Parameters:
+        mask (int): The mask to search.
+        n (int): The zero-based rank of the set bit to find.
+    Returns:
+        int: The index of the bit.
+    """
+    index = 0
+    width = mask.bit_length()
+    while width > 8:
+
+        half = width >> 1
+        low = mask & ((1 << half) - 1)
+        count = low.bit_count()
+        if n < count:
+
+            mask = low
+            width = half
+
+        else:
+
+            n -= count
+            mask >>= half
+            index += half
+            width -= half
+
+    while True:
+
+        if mask & 1:
+
+            if n == 0:
+
+                return index
+
+            n -= 1
+
+        mask >>= 1
+        index += 1
+
+
+@lru_cache(maxsize=None)
+def checkerboard_mask(width, height):
+    """Returns the mask of all cells whose x and y have the same parity."""
+    mask = 0
+    for y in range(height):
+
+        for x in range(y % 2, width, 2):
+
+            mask |= 1 << (y * width + x)
+
+    return mask
+
+
+@lru_cache(maxsize=None)
+def lattice_mask(width, height, step, offset):
+    """
+    Returns the mask of all cells with (x + y) % step == offset.
+
+    Every horizontal or vertical run of step cells crosses exactly one of them, so firing at the
+    lattice finds every ship of length step or more.
+    """
+    mask = 0
+    for y in range(height):
+
+        for x in range((offset - y) % step, width, step):
+
+            mask |= 1 << (y * width + x)
+
+    return mask
+
+
+@lru_cache(maxsize=None)
+def line_mask(width, height, line, orientation):
+    """Returns the mask of row line (HORIZONTAL) or column line (VERTICAL)."""
+    if orientation == Orientation.HORIZONTAL:
+
+        return ((1 << width) - 1) << (line * width)
+
+    return run_mask(width, height, Orientation.VERTICAL) << line
+
+
+class PlacementIndex:
+    """
+    Every in-bounds placement of a ship of one size on a board of one size.
+
+    The geometry never changes between games, so each index is built once by placement_index()
+    and shared by fleet placement, fit checks and density counting.
+    """
+
+    def __init__(self, width, height, size):
+
+        self.width = width
+        self.height = height
+        self.size = size
+        # For each placement: its mask, the cells it covers, its orientation and its origin.
+        self.masks = []
+        self.cells = []
+        self.orientations = []
+        self.origins = []
+        covering = [set() for _ in range(width * height)]
+        for orientation in Orientation:
+
+            step = 1 if orientation == Orientation.HORIZONTAL else width
+            mask = run_mask(width, size, orientation)
+            for y in range(height - (size - 1 if orientation == Orientation.VERTICAL else 0)):
+
+                for x in range(width - (size - 1 if orientation == Orientation.HORIZONTAL else 0)):
+
+                    start = y * width + x
+                    placement_cells = tuple(start + i * step for i in range(size))
+                    for cell in placement_cells:
+
+                        covering[cell].add(len(self.masks))
+
+                    self.masks.append(mask << start)
+                    self.cells.append(placement_cells)
+                    self.orientations.append(orientation)
+                    self.origins.append((x, y))
+
+        # For each cell, the placements covering it and how many there are.
+        self.covering = [frozenset(placements) for placements in covering]
+        self.coverage = [len(placements) for placements in covering]
+
+
+@lru_cache(maxsize=None)
+def placement_index(width, height, size):
+    """Returns the shared PlacementIndex for a ship size, building it on first use."""
+    return PlacementIndex(width, height, size)
+
+
+class FleetSampler:
+    """
+    Samples non-overlapping ship placements without rejection.
+
+    For each ship size it keeps the placements in a list whose first count entries are the ones
+    that don't overlap any placed ship, and the slot of each placement in that list. Blocking
+    cells swaps only the placements that cover them out of the open part. The lists start in
+    placement order, so reset() for the next fleet only restores the slots the swaps touched:
+    the closed part, and the open slots logged as they were swapped into. A sampler is built
+    once per GameManager, and placing a fleet costs time in proportion to the ships' cells
+    rather than to the number of retries or the size of the board.
+    """
+
+    def __init__(self, width, height, sizes, rng=None):
+
+        self.rng = rng
+        self.indexes = {}
+        self.open = {}
+        self.slots = {}
+        self.counts = {}
+        # The open slots each size's swaps have moved a placement into since the last reset.
+        self.touched = {}
+        for size in set(sizes):
+
+            index = placement_index(width, height, size)
+            self.indexes[size] = index
+            self.open[size] = list(range(len(index.masks)))
+            self.slots[size] = list(range(len(index.masks)))
+            self.counts[size] = len(index.masks)
+            self.touched[size] = []
+
+    def reset(self, rng):
+        """
+        Reopens every placement for a new fleet, restoring the lists to placement order, so each
+        fleet's draws depend only on its random stream.
+
+        Parameters:
+            rng (Random): The random stream to draw the new fleet from.
+        """
+        self.rng = rng
+        for size, placements in self.open.items():
+
+            slots = self.slots[size]
+            count = self.counts[size]
+            touched = self.touched[size]
+            # Every placement out of place was moved out of a slot that was touched, so putting
+            # each touched slot back in order restores both lists.
+            end = len(placements)
+            placements[count:] = slots[count:] = range(count, end)
+            for slot in touched:
+
+                placements[slot] = slots[slot] = slot
+
+            self.counts[size] = end
+            touched.clear()
+
+    def sample(self, size, weights=None):
+        """
+        Picks a random open placement of a ship size.
+
+        Parameters:
+            size (int): The size of the ship.
+            weights (list): The relative weight of every placement of the size, in PlacementIndex
+                order, or None to pick uniformly.
+        Returns:
+            tuple: The PlacementIndex of the size and the id of the chosen placement.
+        """
+        count = self.counts[size]
+        if not count:
+
+            raise ValueError("No room left on the board for a ship of size " + str(size))
+
+        placements = self.open[size]
+        if weights is not None:
+
+            placements = placements[:count]
+            return self.indexes[size], self.rng.choices(placements, [weights[placement] for placement in placements])[0]
+
+        return self.indexes[size], placements[self.rng.randrange(count)]
+
+    def block(self, cells):
+        """Closes every open placement, of any size, that covers one of cells."""
+        for size, index in self.indexes.items():
+
+            placements = self.open[size]
+            slots = self.slots[size]
+            touched = self.touched[size]
+            count = self.counts[size]
+            for cell in cells:
+
+                for placement in index.covering[cell]:
+
+                    slot = slots[placement]
+                    if slot < count:
+
+                        # Swap the last open placement into this slot.
+                        count -= 1
+                        other = placements[count]
+                        placements[slot] = other
+                        placements[count] = placement
+                        slots[other] = slot
+                        slots[placement] = count
+                        touched.append(slot)
+
+            self.counts[size] = count
+
+
+@lru_cache(maxsize=None)
+def start_mask(width, height, size):
+    """Returns the mask of cells where a horizontal ship of length size can start in bounds."""
+    row = (1 << (width - size + 1)) - 1 if size <= width else 0
+    return sum(row << (y * width) for y in range(height))
+
+
+def fit_mask(empty, width, height, size):
+    """
+    Finds every empty cell that a ship of length size could cover, using shifted masks rather
+    than listing placements, so the cost grows with the ship size instead of the board size.
+
+    Parameters:
+        empty (int): The mask of empty cells.
+        width (int): The width of the board.
+        height (int): The height of the board.
+        size (int): The length of the ship.
+    Returns:
+        int: The mask of cells covered by some placement that only uses empty cells.
+    """
+    # The start cells of horizontal and vertical runs of empty cells of length size.
+    horizontal = empty & start_mask(width, height, size)
+    vertical = empty
+    for i in range(1, size):
+
+        horizontal &= empty >> i
+        vertical &= empty >> (i * width)
+    # Spread each start cell over the cells of its run.
+    fits = 0
+    for i in range(size):
+
+        fits |= (horizontal << i) | (vertical << (i * width))
+
+    return fits
+
+
+@lru_cache(maxsize=None)
+def run_mask(width, size, orientation):
+    """Returns the mask of a ship of length size at (0, 0) on a board of the given width."""
+    if orientation == Orientation.HORIZONTAL:
+
+        return (1 << size) - 1
+
+    return sum(1 << (i * width) for i in range(size))
+
+
+class Bitboard:
+    """
+    A board stored as one integer bit mask per ShipCell, where cell (x, y) is bit y * width + x.
+
+    Indexing and iterating give rows of ShipCells, so it can still be read like a 2D list (as in
+    GameUI.draw_board and Log.display_board), but writes go through set() and place().
+    """
+
+    def __init__(self, width, height):
+
+        self.width = width
+        self.height = height
+        # The mask of every non-empty ShipCell on the board.
+        self.masks = {}
+        # The mask of all non-empty cells.
+        self.occupied = 0
+        self.full = (1 << (width * height)) - 1
+
+    def index(self, position):
+        """Returns the bit index of a position."""
+        return position[1] * self.width + position[0]
+
+    def bit(self, position):
+        """Returns the single bit mask of a position."""
+        return 1 << (position[1] * self.width + position[0])
+
+    def position(self, index):
+        """Returns the position of a bit index."""
+        return index % self.width, index // self.width
+
+    def empty_mask(self):
+        """Returns the mask of all empty cells."""
+        return self.full & ~self.occupied
+
+    def get(self, position):
+        """
+        Gets the ShipCell at a position.
+
+        Parameters:
+            position (tuple): The position to look up.
+        Returns:
+            ShipCell: The cell at the position.
+        """
+        bit = self.bit(position)
+        if self.occupied & bit:
+
+            for cell, mask in self.masks.items():
+
+                if mask & bit:
+
+                    return cell
+
+        return ShipCell.EMPTY
+
+    def set(self, position, cell):
+        """
+        Sets the ShipCell at a position.
+
+        Parameters:
+            position (tuple): The position to set.
+            cell (ShipCell): The new cell.
+        """
+        bit = self.bit(position)
+        if self.occupied & bit:
+
+            for other, mask in self.masks.items():
+
+                if mask & bit:
+
+                    self.masks[other] = mask & ~bit
+
+            self.occupied &= ~bit
+
+        if cell != ShipCell.EMPTY:
+
+            self.place(bit, cell)
+
+    def place(self, mask, cell):
+        """Marks every cell of an empty mask as cell."""
+        self.masks[cell] = self.masks.get(cell, 0) | mask
+        self.occupied |= mask
+
+    def ship_mask(self, position, size, orientation):
+        """
+        Gets the mask a ship would cover.
+
+        Parameters:
+            position (tuple): The position of the ship's first cell.
+            size (int): The length of the ship.
+            orientation (Orientation): The orientation of the ship.
+        Returns:
+            int: The mask of the ship's cells, or 0 if it doesn't fit in bounds.
+        """
+        x, y = position
+        if orientation == Orientation.HORIZONTAL:
+
+            fits = 0 <= x and x + size <= self.width and 0 <= y < self.height
+
+        else:
+
+            fits = 0 <= x < self.width and 0 <= y and y + size <= self.height
+
+        if not fits:
+
+            return 0
+
+        return run_mask(self.width, size, orientation) << (y * self.width + x)
+
+    def copy(self):
+        """Returns an independent copy of the board."""
+        board = Bitboard(self.width, self.height)
+        board.masks = dict(self.masks)
+        board.occupied = self.occupied
+        return board
+
+    def __len__(self):
+
+        return self.height
+
+    def __getitem__(self, y):
+
+        return [self.get((x, y)) for x in range(self.width)]
+
+    def __iter__(self):
+
+        for y in range(self.height):
+
+            yield self[y]
+
+
+class LogLevel(Enum):
+    """Enum constant for how much the Log prints, from everything (DEBUG) to nothing (OFF)."""
+    DEBUG = 0
+    INFO = 1
+    OFF = 2
+
+
+class Log:
+    """
+    A helper class that provides static functions for outputting to the console and printing errors.
+
+    Messages are formatted lazily, only when their level is enabled. Callers on hot paths should
+    also check the Log.debug or Log.verbose guards before computing the message arguments, so
+    that disabled logging costs a single attribute lookup.
+    """
+
+    level = LogLevel.DEBUG
+    # True when INFO messages are printed.
+    verbose = True
+    # True when DEBUG messages, such as the per-shot board dumps, are printed.
+    debug = True
+
+    @staticmethod
+    def set_level(level):
+        """
+        Sets the lowest level that is printed and updates the guards.
+
+        Parameters:
+            level (LogLevel): The new level.
+        """
+        Log.level = level
+        Log.verbose = level.value <= LogLevel.INFO.value
+        Log.debug = level.value <= LogLevel.DEBUG.value
+
+    @staticmethod
+    def log(message="", *args, level=LogLevel.INFO):
+        """
+        Prints a given message to the console.
+
+        Parameters:
+            message (str): The message to print, formatted with args using % if any are given.
+            args: The values to format into the message.
+            level (LogLevel): The level of the message.
+        """
+        if level.value >= Log.level.value:
+            print(message % args if args else message)
+
+    @staticmethod
+    def display_board(board, name, level=LogLevel.DEBUG):
+        """
+        Prints a given board in the console in a nice format.
+
+        Parameters:
+            board (List[List[ShipCell]): A 2D list of the board.
+            name (str): The name of the 'owner' of the board (such as "GAME", "HUNTER", etc).
+            level (LogLevel): The level of the message.
+        """
+        if level.value >= Log.level.value:
+
+            print("\n" + "-" * 28)
+            print("\t\t " + name + " BOARD")
+            print("-" * 28)
+            for row in board:
+                print(" ".join(cell.symbol for cell in row))
+
+            print("-" * 28)
+
+class Profiler:
+    """
+    Optional instrumentation of the game loop, recording the calls and time of each phase.
+
+    Nothing in the game checks whether profiling is on. Instead, attach() replaces the phase
+    methods of a GameManager, and of each new hunter, with timed wrappers, so games that are not
+    profiled run the same code as before. Each phase records its call count, its cumulative time
+    (including the phases it calls) and its own time. Turns are also counted and timed per mode,
+    and the hunter's fallbacks from targeting to hunting are added up over the games.
+    """
+
+    # The GameManager methods timed, by phase name.
+    GAME_PHASES = {"placement": "place_ships", "check_hit": "check_hit", "game_over": "game_over"}
+    # The BattleshipHunter methods timed, by phase name. take_turn is timed per mode instead.
+    HUNTER_PHASES = {"hunt": "hunt", "target": "target", "set_mode": "set_mode", "on_hit": "on_hit",
+                     "on_miss": "on_miss"}
+
+    def __init__(self):
+
+        # The stats of each timed function, keyed like cProfile by (file, line, name): the calls,
+        # own time, cumulative time and a dict of the same stats per calling function.
+        self.functions = {}
+        # The function key of each phase name.
+        self.phases = {}
+        # The number of turns and their nanoseconds, by Mode name.
+        self.modes = {mode.name: [0, 0] for mode in Mode}
+        self.games = 0
+        self.hunt_fallbacks = 0
+        # Each running timed call as [key, nanoseconds of its timed callees].
+        self.stack = []
+        # The Log methods replaced while profiling, to be put back by detach().
+        self.replaced = {}
+        self.started = time.perf_counter_ns()
+
+    def key(self, phase, function):
+        """
+        Returns the cProfile style key of a timed function and remembers it for the phase.
+
+        Parameters:
+            phase (str): The name of the phase.
+            function (function): The function, or bound method, being timed.
+        Returns:
+            tuple: The file name, first line number and name of the function.
+        """
+        code = getattr(function, "__func__", function).__code__
+        name = phase if phase == code.co_name else phase + " (" + code.co_name + ")"
+        key = (code.co_filename, code.co_firstlineno, name)
+        self.phases[phase] = key
+        return key
+
+    def record(self, key, caller, total, own):
+        """
+        Adds one call of a timed function to its stats.
+
+        Parameters:
+            key (tuple): The key of the function.
+            caller (tuple): The key of the timed function that called it, or None.
+            total (int): The nanoseconds of the call, including its timed callees.
+            own (int): The nanoseconds of the call, excluding its timed callees.
+        """
+        stats = self.functions.get(key)
+        if stats is None:
+
+            stats = self.functions[key] = [0, 0, 0, {}]
+
+        stats[0] += 1
+        stats[1] += own
+        stats[2] += total
+        if caller is not None:
+
+            edge = stats[3].get(caller)
+            if edge is None:
+
+                edge = stats[3][caller] = [0, 0, 0]
+
+            edge[0] += 1
+            edge[1] += own
+            edge[2] += total
+
+    def wrap(self, phase, function):
+        """
+        Returns a version of a function that records its calls and time under a phase.
+
+        Parameters:
+            phase (str): The name of the phase.
+            function (function): The function to time.
+        Returns:
+            function: The timed function.
+        """
+        key = self.key(phase, function)
+        stack = self.stack
+        record = self.record
+
+        def timed(*args, **kwargs):
+
+            frame = [key, 0]
+            caller = stack[-1][0] if stack else None
+            stack.append(frame)
+            start = time.perf_counter_ns()
+            try:
+
+                return function(*args, **kwargs)
+
+            finally:
+
+                total = time.perf_counter_ns() - start
+                stack.pop()
+                if stack:
+
+                    stack[-1][1] += total
+
+                record(key, caller, total, total - frame[1])
+
+        return timed
+
+    def attach(self, game_manager):
+        """
+        Times the phases of a GameManager's games, including its UI, recorder and logging.
+
+        Parameters:
+            game_manager (GameManager): The manager to profile. Its hunters are timed as
+                run_game creates them.
+        """
+        game_manager.profiler = self
+        for phase, name in self.GAME_PHASES.items():
+
+            setattr(game_manager, name, self.wrap(phase, getattr(game_manager, name)))
+
+        game_over = game_manager.game_over
+
+        def counted_game_over():
+
+            game_over()
+            self.games += 1
+            self.hunt_fallbacks += game_manager.battleship_hunter.hunt_fallbacks
+
+        game_manager.game_over = counted_game_over
+        if game_manager.ui is not None:
+
+            game_manager.ui.run = self.wrap("ui", game_manager.ui.run)
+            game_manager.ui.get_next = self.wrap("ui_wait", game_manager.ui.get_next)
+
+        if game_manager.recorder is not None:
+
+            game_manager.recorder.on_shot = self.wrap("record", game_manager.recorder.on_shot)
+
+        if game_manager.live is not None:
+
+            game_manager.live.publish = self.wrap("live", game_manager.live.publish)
+
+        for name in ("log", "display_board"):
+
+            self.replaced[name] = Log.__dict__[name]
+            setattr(Log, name, staticmethod(self.wrap("logging", getattr(Log, name))))
+
+    def detach(self):
+        """Puts back the Log methods replaced by attach()."""
+        for name, method in self.replaced.items():
+
+            setattr(Log, name, method)
+
+        self.replaced = {}
+
+    def attach_hunter(self, hunter):
+        """
+        Times the phases of a new hunter, and its turns per mode.
+
+        Parameters:
+            hunter (BattleshipHunter): The hunter created for a game.
+        """
+        for phase, name in self.HUNTER_PHASES.items():
+
+            setattr(hunter, name, self.wrap(phase, getattr(hunter, name)))
+
+        take_turn = self.wrap("turn", hunter.take_turn)
+        modes = self.modes
+
+        def timed_turn():
+
+            start = time.perf_counter_ns()
+            choice = take_turn()
+            # The mode the turn ended in, so a fallback from targeting counts as hunting.
+            mode = modes[hunter.mode.name]
+            mode[0] += 1
+            mode[1] += time.perf_counter_ns() - start
+            return choice
+
+        hunter.take_turn = timed_turn
+
+    def report(self):
+        """
+        Returns a text report of the time spent per phase and per mode.
+
+        Returns:
+            str: The report, one line per phase and mode, slowest phases first.
+        """
+        elapsed = time.perf_counter_ns() - self.started
+        lines = ["Games: %d, wall time %.1f ms, hunt fallbacks %d" %
+                 (self.games, elapsed / 1e6, self.hunt_fallbacks),
+                 "%-10s %10s %12s %12s %10s" % ("phase", "calls", "cumul ms", "own ms", "ns/call")]
+        phases = sorted(self.phases.items(), key=lambda item: -self.functions.get(item[1], [0, 0])[1])
+        for phase, key in phases:
+
+            calls, own, total, _ = self.functions.get(key, (0, 0, 0, None))
+            if calls:
+
+                lines.append("%-10s %10d %12.1f %12.1f %10.0f" % (phase, calls, total / 1e6, own / 1e6,
+                                                                  total / calls))
+
+        for mode, (turns, nanoseconds) in self.modes.items():
+
+            lines.append("%-10s %10d turns %6.1f ms %10.0f ns/turn" %
+                         (mode.lower(), turns, nanoseconds / 1e6, nanoseconds / max(turns, 1)))
+
+        return "\n".join(lines)
+
+    def stats(self):
+        """
+        Returns the timings in the form the pstats module reads from a cProfile dump.
+
+        Returns:
+            dict: Maps each function key to its primitive calls, calls, own seconds, cumulative
+            seconds and the same four values per caller.
+        """
+        return {key: (calls, calls, own / 1e9, total / 1e9,
+                      {caller: (edge[0], edge[0], edge[1] / 1e9, edge[2] / 1e9)
+                       for caller, edge in callers.items()})
+                for key, (calls, own, total, callers) in self.functions.items()}
+
+    def dump_stats(self, path):
+        """
+        Saves the timings like cProfile.Profile.dump_stats(), for pstats.Stats or snakeviz.
+
+        Parameters:
+            path (str): The file to write.
+        """
+        with open(path, "wb") as file:
+
+            marshal.dump(self.stats(), file)
+
+
+def game_seed(seed, game_num, stream):
+    """
+    Derives the seed of one random stream of one game from a master seed.
+
+    Parameters:
+        seed (int): The master seed.
+        game_num (int): The number of the game.
+        stream (str): The purpose of the stream, such as "placement" or "hunter".
+    Returns:
+        int: A 64-bit seed that is independent for every combination of the parameters.
+    """
+    digest = hashlib.blake2b(f"{seed}:{game_num}:{stream}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class GameManager:
+    """Main game manager class."""
+
+    def __init__(self, headless=False, strategy="basic", config=None, log_level=LogLevel.OFF, seed=None,
+                 game_num=1, profiler=None):
+
+        self.config = config or GameConfig()
+        self.ships = {ship_cell: Battleship(name, size) for ship_cell, name, size in self.config.ships}
+        # The placement lists of the fleet, reset for each game.
+        self.sampler = FleetSampler(self.config.width, self.config.height, [size for _, _, size in self.config.ships])
+        self.shots_hit = []
+        self.total_shots = []
+        self.accuracies = []
+        self.hunt_fallbacks = []
+        # The turn each ship sank on, per game.
+        self.sink_turns = []
+        self.strategy = strategy
+        self.headless = headless
+        self.display = not headless
+        self.manual = not headless
+        self.game_num = game_num
+        # The master seed. Each game's placement and hunter streams are derived from it and the
+        # game number, so any game can be replayed on its own and two strategies given the same
+        # seed face identical boards.
+        self.seed = random.randrange(2 ** 64) if seed is None else seed
+        # The LiveRunner showing this manager's games, if any.
+        self.live = None
+        # The Recorder saving this manager's games, if any.
+        self.recorder = None
+        # The ResultsStore or GameStats receiving this manager's stats instead of the lists
+        # above, if any.
+        self.results_store = None
+        # The AdversarialPlacement weighting the fleet placements, or None to place uniformly.
+        self.placement = None
+        # The Profiler timing this manager's games, if any.
+        self.profiler = None
+
+        # The console log level is global, so a manager made alongside others, like a
+        # GameServer session's, passes None to leave it alone.
+        if log_level is not None:
+
+            Log.set_level(log_level)
+
+        # Headless managers are driven by run_simulations() and never touch pygame.
+        if headless:
+
+            self.ui = None
+            if profiler is not None:
+
+                profiler.attach(self)
+            return
+
+        self.ui = GameUI(self)
+        if profiler is not None:
+
+            profiler.attach(self)
+
+        # Accuracy and speed over many games are measured headlessly, by run_simulations() and
+        # run_benchmarks().
+        self.run_game()
+
+    def run_game(self):
+        """Runs a single game of battleship."""
+        # Place the ships on the board.
+        self.place_ships()
+        # Initialize the hunter.
+        self.battleship_hunter = BattleshipHunter(self, self.strategy, self.game_rng("hunter"))
+        if self.profiler is not None:
+
+            self.profiler.attach_hunter(self.battleship_hunter)
+
+        if Log.debug:
+
+            Log.display_board(self.board, "GAME")
+        # Main game loop.
+        while self.ships_remaining > 0:
+            # Get the hunter's choice.
+            call = self.battleship_hunter.take_turn()
+            # If display is active, show on screen.
+            if self.display:
+
+                self.ui.run()
+                time.sleep(0.04)
+            # Check if the shot hit.
+            result = self.check_hit(call)
+            if self.recorder is not None:
+
+                self.recorder.on_shot(call, result)
+            if result != ShipCell.MISS:
+
+                self.battleship_hunter.on_hit(result, call)
+
+            else:
+
+                self.battleship_hunter.on_miss(call)
+
+            if Log.debug:
+
+                Log.log(level=LogLevel.DEBUG)
+                Log.display_board(self.board, "GAME")
+                Log.log("Ships Left: %d", self.ships_left(), level=LogLevel.DEBUG)
+            # In live mode, publish the board for the UI thread, which also steps manual mode.
+            if self.live is not None:
+
+                self.live.publish()
+            # If manual is active, wait for the user's input.
+            elif self.manual:
+
+                self.ui.get_next()
+        # If display is active, show on screen one last time at the end of the game.
+        if self.display:
+
+            self.ui.run()
+            if not self.manual:
+
+                time.sleep(1.25)
+
+        if not self.headless:
+
+            print(f"Game #{self.game_num} finished!")
+        # Trigger the game over sequence.
+        self.game_over()
+        if self.recorder is not None:
+
+            self.recorder.end_game(self)
+        # If manual is active, wait until the user presses a button to continue to the next game.
+        if self.manual and self.live is None:
+
+            self.ui.get_next()
+
+    def game_rng(self, stream):
+        """
+        Creates the random stream of the current game for one purpose.
+
+        Parameters:
+            stream (str): The purpose of the stream, such as "placement" or "hunter".
+        Returns:
+            Random: A generator seeded from the master seed, the game number and the stream.
+        """
+        return random.Random(game_seed(self.seed, self.game_num, stream))
+
+    def ships_left(self):
+        """
+        Gets the number of ships that have not sunk, which sink_ship keeps up to date.
+
+        Returns:
+            int: The number of ships left.
+        """
+        return self.ships_remaining
+
+    def can_place(self, ship):
+        """
+        Checks if a ship can be placed.
+
+        Parameters:
+            ship (Battleship): The ship to be placed. Contains the position and orientation of the ship.
+        Returns:
+            bool: True if the ship can be placed, False otherwise.
+        """
+
+        # Check bounds or overlapping ship
+        mask = self.board.ship_mask(ship.position, ship.size, ship.orientation)
+        return bool(mask) and not mask & self.board.occupied
+
+    def place_ship(self, ship, ship_cell):
+        """Places ship on the board at its position."""
+        self.board.place(self.board.ship_mask(ship.position, ship.size, ship.orientation), ship_cell)
+
+    def place_ships(self):
+        """Generates the initial game board and places all of the ships."""
+        self.board = Bitboard(self.config.width, self.config.height)
+        sampler = self.sampler
+        sampler.reset(self.game_rng("placement"))
+        for ship_cell, ship in self.ships.items():
+
+            # Draw uniformly from the placements that are still open, which gives the same
+            # distribution as retrying random placements until one fits, unless a placement
+            # strategy weights them.
+            weights = None if self.placement is None else self.placement.weights[ship.size]
+            index, placement = sampler.sample(ship.size, weights)
+            ship.set_orientation(index.orientations[placement])
+            ship.set_position(index.origins[placement])
+            self.board.place(index.masks[placement], ship_cell)
+            sampler.block(index.cells[placement])
+            ship.hits = 0
+            ship.sunk = False
+            ship.sunk_turn = None
+
+        self.ships_remaining = len(self.ships)
+        # The number of shots fired this game, and the mask of the cells they hit.
+        self.turn = 0
+        self.fired = 0
+
+    def check_hit(self, position):
+        """
+        Checks if position would hit a ship, counting it as a shot.
+
+        The first hit on each cell of a ship is recorded on its Battleship, and the ship is sunk
+        once every cell has been hit.
+
+        Parameters:
+            position (tuple): The position to check for a hit.
+        Returns:
+            ShipCell: The ID of the ShipCell hit.
+        """
+        if Log.debug:
+
+            Log.log("%s", self.board.get((0, 0)), level=LogLevel.DEBUG)
+        self.turn += 1
+        bit = self.board.bit(position)
+        if self.board.occupied & bit:
+
+            ship_cell = self.board.get(position)
+            if not self.fired & bit:
+
+                self.fired |= bit
+                if self.ships[ship_cell].hit():
+
+                    self.sink_ship(ship_cell)
+
+            return ship_cell
+
+        return ShipCell.MISS
+
+    def sink_ship(self, ship):
+        """
+        Sinks a ship, if it isn't already sunk, and records the turn it sank on.
+
+        Parameters:
+            ship (ShipCell): The key of the ship that has sunk.
+        """
+        battleship = self.ships[ship]
+        if not battleship.sunk:
+
+            battleship.set_sunk(True)
+            battleship.sunk_turn = self.turn
+            self.ships_remaining -= 1
+
+    def game_over(self):
+        """Updates the overall stats after completing a game."""
+        if Log.verbose:
+
+            Log.log("Game Over!")
+            Log.display_board(self.battleship_hunter.board, "HUNTER", LogLevel.INFO)
+            Log.display_board(self.board, "GAME", LogLevel.INFO)
+            Log.log()
+            Log.log("Accuracy: %d / %d (%s%%)", self.battleship_hunter.shots_hit, self.battleship_hunter.total_shots,
+                    round(float(self.battleship_hunter.shots_hit) / float(self.battleship_hunter.total_shots) * 100, 2))
+        if self.results_store is not None:
+
+            hunter = self.battleship_hunter
+            self.results_store.append(hunter.shots_hit, hunter.total_shots,
+                                      float(hunter.shots_hit) / float(hunter.total_shots) * 100,
+                                      hunter.hunt_fallbacks)
+            return
+
+        self.shots_hit.append(self.battleship_hunter.shots_hit)
+        self.total_shots.append(self.battleship_hunter.total_shots)
+        self.accuracies.append(float(self.battleship_hunter.shots_hit) /
+                               float(self.battleship_hunter.total_shots) * 100)
+        self.hunt_fallbacks.append(self.battleship_hunter.hunt_fallbacks)
+        self.sink_turns.append({ship.name: ship.sunk_turn for ship in self.ships.values()})
+
+
+class GameUI:
+    """Class that manages the UI display of the game, including the Battleship board and stats."""
+
+    def __init__(self, _game_manager):
+
+        global pygame
+        import pygame
+
+        pygame.init()
+        self.screen = pygame.display.set_mode((800, 600))
+        pygame.display.set_caption("Battleship")
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.Font(None, 36)
+        self.margin = 50  # Margin around the grid
+        self.game_manager = _game_manager
+        # Size of each grid cell, shrunk so that large boards still fit in the window.
+        config = _game_manager.config
+        self.cell_size = max(1, min(40, (800 - 2 * self.margin) // config.width,
+                                    (600 - 2 * self.margin - 20) // config.height))
+        # Colors for each ShipCell.
+        self.colors = {
+            ShipCell.EMPTY: (250, 250, 250),  # Light Grey
+            ShipCell.MISS: (50, 50, 50),  # Dark Grey
+            ShipCell.DESTROYER: (0, 200, 0),  # Green
+            ShipCell.CARRIER: (0, 0, 200),  # Blue
+            ShipCell.CRUISER: (200, 0, 200),  # Purple
+            ShipCell.BATTLESHIP: (0, 200, 200),  # Teal
+            ShipCell.SUBMARINE: (200, 200, 0)  # Yellow
+        }
+        # The game drawn in the last frame and a copy of its masks, to find the changed cells.
+        self.drawn_game = None
+        self.drawn_masks = {}
+        # The text and area of each stats line in the last frame.
+        self.drawn_stats = {}
+
+    def draw_board(self, board):
+        """Draws the board and fills in the cells."""
+        for y, row in enumerate(board):
+
+            for x, cell in enumerate(row):
+
+                self.draw_cell((x, y), cell)
+
+    def draw_cell(self, position, cell):
+        """
+        Draws a single cell of the board.
+
+        Parameters:
+            position (tuple): The position of the cell.
+            cell (ShipCell): The contents of the cell.
+        Returns:
+            Rect: The area of the screen that was drawn.
+        """
+        x, y = position
+        rect = pygame.Rect(
+            self.margin + x * self.cell_size,
+            self.margin + 20 + y * self.cell_size,
+            self.cell_size,
+            self.cell_size
+        )
+        # Sets the color of this cell and draws it.
+        color = self.get_color(cell)
+        pygame.draw.rect(self.screen, color, rect)
+        pygame.draw.rect(self.screen, (0, 0, 0), rect, 1)  # Black grid lines
+        return rect
+
+    def draw_changes(self, board):
+        """
+        Draws only the cells whose contents changed since the last frame.
+
+        Parameters:
+            board (Bitboard): The board being displayed, which was also drawn last frame.
+        Returns:
+            list: The areas of the screen that were drawn.
+        """
+        changed = 0
+        for cell in set(board.masks) | set(self.drawn_masks):
+
+            changed |= board.masks.get(cell, 0) ^ self.drawn_masks.get(cell, 0)
+
+        rects = []
+        while changed:
+
+            index = (changed & -changed).bit_length() - 1
+            changed &= changed - 1
+            position = board.position(index)
+            rects.append(self.draw_cell(position, board.get(position)))
+
+        return rects
+
+    def get_color(self, cell):
+        """Returns the color of a ShipCell, or of the ship type of a FleetCell."""
+        if cell in self.colors:
+
+            return self.colors[cell]
+
+        return self.colors.get(cell.kind, (200, 100, 0))  # Orange for custom ship types
+
+    def draw_stats(self, snapshot):
+        """
+        Displays game stats, redrawing only the lines whose text changed.
+
+        Parameters:
+            snapshot (BoardSnapshot): The state being displayed.
+        Returns:
+            list: The areas of the screen that were drawn.
+        """
+        rects = []
+        # Draw the game number.
+        rects += self.draw_text(f"Game #{snapshot.game_num}", (10, 10))
+        # Draw the stats.
+        rects += self.draw_text(
+            f"Shots: {snapshot.total_shots} | " +
+            f"Hits: {snapshot.shots_hit} | " +
+            f"Accuracy: {round((snapshot.shots_hit / max(1, snapshot.total_shots)) * 100, 2)}%",
+            (10, 40)
+        )
+        return rects
+
+    def draw_text(self, text, position):
+        """
+        Draws a line of text, if it differs from the line drawn there last.
+
+        The line is rendered whole, as the full redraw did, so its kerning and so its pixels are
+        the same.
+
+        Parameters:
+            text (str): The text to draw.
+            position (tuple): The top left corner of the line on the screen.
+        Returns:
+            list: The areas of the screen that were drawn.
+        """
+        last_text, last_rect = self.drawn_stats.get(position, (None, None))
+        if text == last_text:
+
+            return []
+
+        rects = []
+        if last_rect is not None:
+
+            self.screen.fill((0, 0, 0), last_rect)
+            rects.append(last_rect)
+
+        surface = self.font.render(text, True, (255, 255, 255))
+        rect = self.screen.blit(surface, position)
+        self.drawn_stats[position] = (text, rect)
+        rects.append(rect)
+        return rects
+
+    def handle_events(self):
+        """
+        Handles user input.
+
+        Returns:
+            bool: True if a key other than ESC or M was pressed, False otherwise.
+        """
+        next_input = False
+        for event in pygame.event.get():
+
+            if event.type == pygame.KEYDOWN:
+
+                if event.key == pygame.K_ESCAPE:
+
+                    pygame.quit()
+                    sys.exit()
+
+                elif event.key == pygame.K_m:
+
+                    self.game_manager.manual = not self.game_manager.manual
+
+                else:
+
+                    next_input = True
+
+            if event.type == pygame.QUIT:
+
+                pygame.quit()
+                sys.exit()
+
+        return next_input
+
+    def display(self, snapshot=None):
+        """
+        Updates the screen with the current board and stats.
+
+        The first frame of each game redraws the whole screen. After that only the cells and
+        stats lines that changed are drawn and pushed to the display.
+
+        Parameters:
+            snapshot (BoardSnapshot): The state to show, defaulting to the live game's state.
+        """
+        if snapshot is None:
+
+            hunter = self.game_manager.battleship_hunter
+            snapshot = BoardSnapshot(self.game_manager.game_num, hunter.board, hunter.total_shots,
+                                     hunter.shots_hit)
+
+        board = snapshot.board
+        if snapshot.game_num != self.drawn_game:
+
+            self.screen.fill((0, 0, 0))  # Clear the screen
+            self.draw_board(board)
+            self.drawn_stats = {}
+            self.draw_stats(snapshot)
+            pygame.display.flip()
+
+        else:
+
+            rects = self.draw_changes(board) + self.draw_stats(snapshot)
+            if rects:
+
+                pygame.display.update(rects)
+
+        self.drawn_game = snapshot.game_num
+        self.drawn_masks = dict(board.masks)
+
+    def run(self):
+        """Takes user input and updates the screen as needed."""
+        self.handle_events()
+        self.display()
+        self.clock.tick(60)
+
+    def get_next(self):
+        """Awaits user input before moving on to the next step in the game."""
+        next_input = False
+        while not next_input:
+
+            for event in pygame.event.get():
+
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit()
+
+                if event.type == pygame.KEYDOWN:
+
+                    if event.key == pygame.K_ESCAPE:
+
+                        pygame.quit()
+                        sys.exit()
+
+                    elif event.key == pygame.K_m:
+
+                        self.game_manager.manual = not self.game_manager.manual
+                        return
+
+                    else:
+
+                        next_input = True
+
+class BoardSnapshot:
+    """The hunter's board and stats at one moment of a game, as shown by the GameUI."""
+
+    def __init__(self, game_num, board, total_shots, shots_hit):
+
+        self.game_num = game_num
+        self.board = board
+        self.total_shots = total_shots
+        self.shots_hit = shots_hit
+
+
+class LiveRunner:
+    """
+    Runs games at full speed on a background thread while the GameUI, on the main thread,
+    shows the latest published snapshot at a fixed frame rate.
+
+    The simulation only copies the hunter's board when the UI has shown the previous snapshot,
+    so intermediate frames are skipped at almost no cost. M still toggles manual mode, where
+    the simulation waits for a key press after every shot, and ESC quits.
+    """
+
+    def __init__(self, game_manager, games, fps=30):
+
+        self.game_manager = game_manager
+        self.games = games
+        self.fps = fps
+        self.snapshot = None
+        # Set by the UI when it wants a new snapshot.
+        self.wanted = True
+        # Set by the UI to let a manual step continue.
+        self.step = threading.Event()
+        self.finished = False
+        game_manager.live = self
+        game_manager.display = False
+        game_manager.manual = False
+        self.ui = GameUI(game_manager)
+
+    def publish(self, force=False):
+        """
+        Publishes a copy of the hunter's board if the UI wants one, then waits for a key press
+        if manual mode is on. Called by the simulation thread after every shot.
+
+        Parameters:
+            force (bool): Publish even if the UI hasn't shown the last snapshot yet.
+        """
+        game_manager = self.game_manager
+        if self.wanted or force or game_manager.manual:
+
+            hunter = game_manager.battleship_hunter
+            self.snapshot = BoardSnapshot(game_manager.game_num, hunter.board.copy(),
+                                          hunter.total_shots, hunter.shots_hit)
+            self.wanted = False
+
+        if game_manager.manual:
+
+            self.step.wait()
+            self.step.clear()
+
+    def simulate(self):
+        """Plays all of the games. Runs on the simulation thread."""
+        for _ in range(self.games):
+
+            self.game_manager.run_game()
+            self.game_manager.game_num += 1
+
+        self.game_manager.game_num -= 1
+        self.publish(force=True)
+        self.finished = True
+
+    def run(self):
+        """Starts the simulation thread and draws snapshots until all games have finished."""
+        thread = threading.Thread(target=self.simulate, daemon=True)
+        thread.start()
+        shown = None
+        while True:
+
+            next_input = self.ui.handle_events()
+            if next_input or not self.game_manager.manual:
+
+                self.step.set()
+
+            snapshot = self.snapshot
+            if snapshot is not shown:
+
+                self.ui.display(snapshot)
+                shown = snapshot
+                self.wanted = True
+
+            elif self.finished:
+
+                break
+
+            self.ui.clock.tick(self.fps)
+
+        thread.join()
+
+
+class Recorder:
+    """
+    Records games in a compact binary format: the fleet placement plus the sequence of shots.
+
+    The file starts with a header (b"BSR1", the board width and height, and the fleet in
+    GameConfig.parse_fleet() format). Games are then appended in zlib-compressed blocks, each a
+    "<II" count of games and compressed length followed by the data. Inside a block each game is
+    its "<I" game number, its shot count and a code per ship (origin cell * 2 + orientation), both
+    stored in 2 bytes, or 4 on boards too large for 2, and one code per shot (cell * (ships + 1) +
+    result, where result 0 is a miss and i is the i-th ship of the fleet), stored in the fewest of
+    1, 2 or 4 bytes that fit every code.
+    """
+
+    MAGIC = b"BSR1"
+
+    def __init__(self, path, config, block_games=256):
+
+        self.config = config
+        self.block_games = block_games
+        self.ship_codes = {ship_cell: number for number, (ship_cell, name, size) in enumerate(config.ships, 1)}
+        self.ship_codes[ShipCell.MISS] = 0
+        self.results = len(config.ships) + 1
+        self.shot_format = Recorder.shot_format(config)
+        self.game_format = Recorder.game_format(config)
+        self.block = bytearray()
+        self.block_count = 0
+        self.shots = array(self.shot_format)
+        fleet = config.format_fleet().encode()
+        self.file = open(path, "wb", buffering=1 << 20)
+        self.file.write(Recorder.MAGIC + struct.pack("<HHH", config.width, config.height, len(fleet)) + fleet)
+
+    @staticmethod
+    def shot_format(config):
+        """Returns the array typecode of the smallest unsigned type that fits every shot code."""
+        largest = config.width * config.height * (len(config.ships) + 1)
+        return "B" if largest <= 0xFF else "H" if largest <= 0xFFFF else "I"
+
+    @staticmethod
+    def game_format(config):
+        """Returns the array typecode of the shot counts and placement codes, 2 bytes if they fit."""
+        largest = config.width * config.height * 2
+        return "H" if largest <= 0xFFFF else "I"
+
+    def on_shot(self, position, result):
+        """Records a shot and its result."""
+        cell = position[1] * self.config.width + position[0]
+        self.shots.append(cell * self.results + self.ship_codes[result])
+
+    def end_game(self, game_manager):
+        """Adds the finished game, with its fleet placement, to the current block."""
+        width = self.config.width
+        codes = array(self.game_format, [len(self.shots)])
+        for ship in game_manager.ships.values():
+
+            x, y = ship.position
+            codes.append((y * width + x) * 2 + ship.orientation.value)
+
+        if sys.byteorder != "little":
+
+            codes.byteswap()
+            self.shots.byteswap()
+
+        self.block += struct.pack("<I", game_manager.game_num)
+        self.block += codes.tobytes()
+        self.block += self.shots.tobytes()
+        self.shots = array(self.shot_format)
+        self.block_count += 1
+        if self.block_count >= self.block_games:
+
+            self.flush()
+
+    def flush(self):
+        """Compresses and appends the current block of games to the file."""
+        if self.block_count:
+
+            data = zlib.compress(bytes(self.block))
+            self.file.write(struct.pack("<II", self.block_count, len(data)) + data)
+            self.block = bytearray()
+            self.block_count = 0
+
+        self.file.flush()
+
+    def close(self):
+        """Writes any remaining games and closes the file."""
+        self.flush()
+        self.file.close()
+
+
+class RecordedGame:
+    """A game read back from a recording: its number, ship placements and shots."""
+
+    def __init__(self, game_num, placements, shots):
+
+        self.game_num = game_num
+        # The (position, orientation) of each ship, in fleet order.
+        self.placements = placements
+        # The (position, result) of each shot, where result is a ShipCell or FleetCell.
+        self.shots = shots
+
+
+class Replayer:
+    """Reads the games of a recording made by Recorder, and replays them headlessly or in the UI."""
+
+    def __init__(self, path):
+
+        self.path = path
+        with open(path, "rb") as file:
+
+            magic = file.read(4)
+            if magic != Recorder.MAGIC:
+
+                raise ValueError(path + " is not a battleship recording")
+
+            width, height, fleet_length = struct.unpack("<HHH", file.read(6))
+            fleet = GameConfig.parse_fleet(file.read(fleet_length).decode())
+            self.header_size = 10 + fleet_length
+
+        self.config = GameConfig(width, height, fleet)
+
+    def games(self):
+        """
+        Reads the recorded games one block at a time.
+
+        Yields:
+            RecordedGame: Each game in the recording.
+        """
+        config = self.config
+        shot_format = Recorder.shot_format(config)
+        shot_size = array(shot_format).itemsize
+        game_format = Recorder.game_format(config)
+        # The shot count and one code per ship.
+        game_size = array(game_format).itemsize * (len(config.ships) + 1)
+        results = [ShipCell.MISS] + [ship_cell for ship_cell, name, size in config.ships]
+        with open(self.path, "rb") as file:
+
+            file.seek(self.header_size)
+            while True:
+
+                header = file.read(8)
+                if len(header) < 8:
+
+                    return
+
+                count, length = struct.unpack("<II", header)
+                data = zlib.decompress(file.read(length))
+                offset = 0
+                for _ in range(count):
+
+                    game_num, = struct.unpack_from("<I", data, offset)
+                    offset += 4
+                    game_codes = array(game_format, data[offset:offset + game_size])
+                    if sys.byteorder != "little":
+
+                        game_codes.byteswap()
+
+                    offset += game_size
+                    shot_count = game_codes[0]
+                    placements = []
+                    for code in game_codes[1:]:
+
+                        cell, orientation = divmod(code, 2)
+                        placements.append(((cell % config.width, cell // config.width), Orientation(orientation)))
+
+                    codes = array(shot_format, data[offset:offset + shot_count * shot_size])
+                    if sys.byteorder != "little":
+
+                        codes.byteswap()
+
+                    offset += shot_count * shot_size
+                    shots = []
+                    for code in codes:
+
+                        cell, result = divmod(code, len(results))
+                        shots.append(((cell % config.width, cell // config.width), results[result]))
+
+                    yield RecordedGame(game_num, placements, shots)
+
+    def load(self, game_manager, game):
+        """Places a recorded game's fleet on a game manager's board, resetting its per-game state."""
+        game_manager.board = Bitboard(self.config.width, self.config.height)
+        for (ship_cell, ship), (position, orientation) in zip(game_manager.ships.items(), game.placements):
+
+            ship.set_position(position)
+            ship.set_orientation(orientation)
+            game_manager.place_ship(ship, ship_cell)
+            ship.hits = 0
+            ship.sunk = False
+            ship.sunk_turn = None
+
+        game_manager.ships_remaining = len(game_manager.ships)
+        game_manager.turn = 0
+        game_manager.fired = 0
+
+    def check(self):
+        """
+        Replays every game through GameManager.check_hit without the UI, checking that each
+        shot gives its recorded result and that the last shot ends the game.
+
+        Returns:
+            list: The numbers of the games that don't match their recording.
+        """
+        game_manager = GameManager(headless=True, config=self.config)
+        mismatches = []
+        for game in self.games():
+
+            self.load(game_manager, game)
+            ok = all(game_manager.check_hit(position) == result for position, result in game.shots)
+            if not ok or game_manager.ships_remaining:
+
+                mismatches.append(game.game_num)
+
+        return mismatches
+
+    def show(self, game_nums=None, delay=0.04):
+        """
+        Replays games in the GameUI, using the same keys as a live game.
+
+        Parameters:
+            game_nums (set): The numbers of the games to show, or None for all of them.
+            delay (float): The time between shots in seconds, when manual mode is off.
+        """
+        game_manager = GameManager(headless=True, config=self.config)
+        ui = GameUI(game_manager)
+        for game in self.games():
+
+            if game_nums is not None and game.game_num not in game_nums:
+
+                continue
+
+            board = Bitboard(self.config.width, self.config.height)
+            shots_hit = 0
+            for total_shots, (position, result) in enumerate(game.shots, 1):
+
+                board.set(position, result)
+                shots_hit += result != ShipCell.MISS
+                ui.display(BoardSnapshot(game.game_num, board, total_shots, shots_hit))
+                if game_manager.manual:
+
+                    ui.get_next()
+
+                else:
+
+                    ui.handle_events()
+                    time.sleep(delay)
+            # As in GameManager.run_game, only manual mode waits for the user between games.
+            if game_manager.manual:
+
+                ui.get_next()
+
+            else:
+
+                ui.handle_events()
+                time.sleep(1.25)
+
+
+class ShotHeatMap:
+    """
+    Counts, for every cell, the turn a hunter first fires at it, over many games.
+
+    It takes a GameManager's shots like a Recorder does, so it can be set as the manager's
+    recorder. A cell never fired at counts as the turn after the game ended. Rather than adding
+    that turn to every unfired cell, each game adds the turn after it ended to one running total,
+    and each fired cell adds how many turns before then it was fired at, so the per-game cost is
+    one addition per shot. The two are folded into the counters before they are read. The counters
+    are an array of 64 bit sums, saved to disk as the header (b"BSH1", the board width and height,
+    and the number of games) followed by the array.
+    """
+
+    MAGIC = b"BSH1"
+
+    def __init__(self, width, height):
+
+        self.width = width
+        self.height = height
+        self.games = 0
+        # The sum over games of the turn each cell was first fired at.
+        self.turn_sums = array("Q", bytes(8 * width * height))
+        # The sum of the turns after each game not yet folded into turn_sums, and the sum over
+        # those games of how much earlier than that each cell was fired at.
+        self.unfired = 0
+        self.savings = array("Q", bytes(8 * width * height))
+        self.turns = {}
+
+    def on_shot(self, position, result):
+        """Records the turn of a shot, if it is the first at its cell this game."""
+        cell = position[1] * self.width + position[0]
+        if cell not in self.turns:
+
+            self.turns[cell] = len(self.turns) + 1
+
+    def end_game(self, game_manager):
+        """Adds the finished game's turns to the pending sums."""
+        unfired = game_manager.turn + 1
+        savings = self.savings
+        for cell, turn in self.turns.items():
+
+            savings[cell] += unfired - turn
+
+        self.unfired += unfired
+        self.games += 1
+        self.turns = {}
+
+    def flush(self):
+        """Folds the pending sums into the counters."""
+        if self.unfired:
+
+            unfired, savings = self.unfired, self.savings
+            for cell, saved in enumerate(savings):
+
+                self.turn_sums[cell] += unfired - saved
+
+            self.unfired = 0
+            self.savings = array("Q", bytes(8 * self.width * self.height))
+
+    def close(self):
+        """Adds any remaining games to the counters."""
+        self.flush()
+
+    def means(self):
+        """
+        Returns the mean turn each cell was first fired at.
+
+        Returns:
+            list: The mean turn of each cell, by bit index.
+        """
+        self.flush()
+        return [total / max(self.games, 1) for total in self.turn_sums]
+
+    def save(self, path):
+        """
+        Writes the counters to a file.
+
+        Parameters:
+            path (str): The file to write.
+        """
+        self.flush()
+        turn_sums = array("Q", self.turn_sums)
+        if sys.byteorder != "little":
+
+            turn_sums.byteswap()
+
+        with open(path, "wb") as file:
+
+            file.write(ShotHeatMap.MAGIC + struct.pack("<HHQ", self.width, self.height, self.games))
+            file.write(turn_sums.tobytes())
+
+    @staticmethod
+    def load(path):
+        """
+        Reads counters written by save().
+
+        Parameters:
+            path (str): The file to read.
+        Returns:
+            ShotHeatMap: The heat map.
+        """
+        with open(path, "rb") as file:
+
+            data = file.read()
+
+        if data[:4] != ShotHeatMap.MAGIC:
+
+            raise ValueError(path + " is not a heat map file")
+
+        width, height, games = struct.unpack_from("<HHQ", data, 4)
+        if len(data) != 16 + 8 * width * height:
+
+            raise ValueError(path + " has the wrong length for a " + str(width) + "x" + str(height) + " heat map")
+
+        heat_map = ShotHeatMap(width, height)
+        heat_map.games = games
+        heat_map.turn_sums = array("Q", data[16:16 + 8 * width * height])
+        if sys.byteorder != "little":
+
+            heat_map.turn_sums.byteswap()
+
+        return heat_map
+
+
+class AdversarialPlacement:
+    """
+    Weights fleet placements toward the cells a hunter fires at last, to give it hard boards.
+
+    A placement is found when the hunter first fires at one of its cells, so it is scored by the
+    earliest mean turn of its cells in a ShotHeatMap. Placements are then weighted by
+    exp(score / temperature): a low temperature places ships only where the hunter looks last,
+    and a high one approaches uniform placement, which a hunter can't learn to exploit.
+    GameManager.place_ships draws from these weights when the manager's placement is set.
+    """
+
+    def __init__(self, heat_map, config, temperature=2.0):
+
+        self.temperature = temperature
+        # The heat map the weights were built from, kept so the placement can be saved.
+        self.heat_map = heat_map
+        means = heat_map.means()
+        # The weight of every placement of each ship size, in PlacementIndex order.
+        self.weights = {}
+        for size in {size for ship_cell, name, size in config.ships}:
+
+            index = placement_index(config.width, config.height, size)
+            scores = [min(means[cell] for cell in cells) for cells in index.cells]
+            # Scores are taken from the best, so the weights can't overflow.
+            best = max(scores)
+            self.weights[size] = [math.exp((score - best) / temperature) for score in scores]
+
+
+class RunningStats:
+    """Keeps the count, mean and variance of a stream of values in constant memory (Welford's method)."""
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+
+        self.count = count
+        self.mean = mean
+        # The sum of squared differences from the mean.
+        self.m2 = m2
+
+    def add(self, value):
+        """Adds a value to the stream."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def variance(self):
+        """Returns the sample variance, or 0 for fewer than two values."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def stddev(self):
+        """Returns the sample standard deviation."""
+        return self.variance() ** 0.5
+
+    def confidence_interval(self, confidence=0.95):
+        """
+        Returns the normal-approximation confidence interval of the mean.
+
+        Parameters:
+            confidence (float): The confidence level, such as 0.95.
+        Returns:
+            tuple: The lower and upper bounds of the interval.
+        """
+        if self.count < 2:
+
+            return float("-inf"), float("inf")
+
+        half_width = NormalDist().inv_cdf((1 + confidence) / 2) * (self.variance() / self.count) ** 0.5
+        return self.mean - half_width, self.mean + half_width
+
+
+class MappedColumn:
+    """A typed column of values stored in a memory-mapped file, grown by remapping."""
+
+    def __init__(self, path, typecode, writable):
+
+        self.path = path
+        self.typecode = typecode
+        self.itemsize = array(typecode).itemsize
+        self.writable = writable
+        if writable:
+
+            open(path, "wb").close()
+
+        self.file = open(path, "r+b" if writable else "rb")
+        self.map = None
+        self.values = None
+
+    def capacity(self):
+        """Returns the number of values that fit in the current mapping."""
+        return len(self.values) if self.values is not None else 0
+
+    def remap(self, capacity):
+        """
+        Maps the first capacity values of the file, growing the file first if writable.
+
+        Parameters:
+            capacity (int): The number of values to map.
+        """
+        if self.values is not None:
+
+            self.values.release()
+            self.map.close()
+
+        size = capacity * self.itemsize
+        if self.writable and os.fstat(self.file.fileno()).st_size < size:
+
+            self.file.truncate(size)
+
+        if size == 0:
+
+            self.map = self.values = None
+            return
+
+        access = mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ
+        self.map = mmap.mmap(self.file.fileno(), size, access=access)
+        self.values = memoryview(self.map).cast(self.typecode)
+
+    def close(self):
+        """Unmaps and closes the file."""
+        if self.values is not None:
+
+            self.values.release()
+            self.map.close()
+            self.values = self.map = None
+
+        self.file.close()
+
+
+class ResultsStore:
+    """
+    Stores per-game stats as typed, memory-mapped columns in a directory, with running
+    aggregates, instead of growing lists of Python objects.
+
+    Each stat is a column file of fixed-size values (see COLUMNS), plus a histogram of total
+    shots, which starts with max_shots + 1 bins and grows to fit larger boards. meta.bin holds
+    the game count and the running mean and M2 of each column. The writer updates the count
+    last, so another process can open the store with mode "r" and call refresh() to read the
+    games written so far, even while the run is still going.
+    """
+
+    COLUMNS = (
+        ("shots_hit", "I"),
+        ("total_shots", "I"),
+        ("accuracies", "f"),
+        ("hunt_fallbacks", "I"),
+    )
+    MAGIC = b"BSRS"
+    # Magic, game count and histogram length, then the mean and M2 of each column.
+    META = struct.Struct("<4sQQ" + "dd" * len(COLUMNS))
+
+    def __init__(self, path, mode="r", max_shots=100, capacity=1 << 16):
+
+        self.path = path
+        self.writable = mode == "w"
+        if self.writable:
+
+            os.makedirs(path, exist_ok=True)
+
+        self.columns = {name: MappedColumn(os.path.join(path, name + ".col"), typecode, self.writable)
+                        for name, typecode in ResultsStore.COLUMNS}
+        self.histogram = MappedColumn(os.path.join(path, "histogram.col"), "Q", self.writable)
+        self.meta = MappedColumn(os.path.join(path, "meta.bin"), "B", self.writable)
+        self.count = 0
+        self.stats = {name: RunningStats() for name, typecode in ResultsStore.COLUMNS}
+        if self.writable:
+
+            self.meta.remap(ResultsStore.META.size)
+            self.histogram.remap(max_shots + 1)
+            for column in self.columns.values():
+
+                column.remap(capacity)
+
+            self.write_meta()
+
+        else:
+
+            self.refresh()
+
+    def append(self, shots_hit, total_shots, accuracy, hunt_fallbacks):
+        """Adds the stats of one game."""
+        index = self.count
+        if index >= self.columns["total_shots"].capacity():
+
+            for column in self.columns.values():
+
+                column.remap(max(1, 2 * column.capacity()))
+
+        for (name, column), value in zip(self.columns.items(), (shots_hit, total_shots, accuracy, hunt_fallbacks)):
+
+            column.values[index] = value
+            self.stats[name].add(value)
+
+        if total_shots >= self.histogram.capacity():
+
+            # Games on boards of more than max_shots cells can take more shots, so grow the
+            # histogram before counting them.
+            self.histogram.remap(max(total_shots + 1, 2 * self.histogram.capacity()))
+
+        self.histogram.values[total_shots] += 1
+        self.count = index + 1
+        self.write_meta()
+
+    def write_meta(self):
+        """Writes the aggregates, then the game count, to meta.bin."""
+        aggregates = []
+        for stats in self.stats.values():
+
+            aggregates += [stats.mean, stats.m2]
+
+        # Everything but the count is written around it, so a reader never sees the count drop.
+        meta = self.meta.map
+        struct.pack_into("<4s", meta, 0, ResultsStore.MAGIC)
+        struct.pack_into("<Q" + "dd" * len(ResultsStore.COLUMNS), meta, 12, self.histogram.capacity(),
+                         *aggregates)
+        struct.pack_into("<Q", meta, 4, self.count)
+
+    def refresh(self):
+        """Reads the game count and aggregates written so far and maps any new data. Readers only."""
+        self.meta.remap(0)
+        if os.path.getsize(self.meta.path) < ResultsStore.META.size:
+
+            return
+
+        self.meta.remap(ResultsStore.META.size)
+        magic, count, histogram_length, *aggregates = ResultsStore.META.unpack_from(self.meta.map)
+        if magic != ResultsStore.MAGIC:
+
+            raise ValueError(self.path + " is not a results store")
+
+        self.count = count
+        for number, name in enumerate(self.stats):
+
+            self.stats[name] = RunningStats(count, aggregates[2 * number], aggregates[2 * number + 1])
+
+        if self.histogram.capacity() != histogram_length:
+
+            self.histogram.remap(histogram_length)
+
+        for column in self.columns.values():
+
+            if column.capacity() < count:
+
+                column.remap(os.path.getsize(column.path) // column.itemsize)
+
+    def column(self, name):
+        """Returns a read-only view of the stored values of a column. Release it before refresh()."""
+        values = self.columns[name].values
+        return values[:self.count].toreadonly() if values is not None else memoryview(array("I"))
+
+    def close(self):
+        """Flushes and closes all of the files, trimming the columns to the games written."""
+        if self.writable:
+
+            for column in self.columns.values():
+
+                column.map.flush()
+
+        for column in list(self.columns.values()) + [self.histogram, self.meta]:
+
+            column.close()
+
+        if self.writable:
+
+            for column in self.columns.values():
+
+                os.truncate(column.path, self.count * column.itemsize)
+
+
+class Battleship:
+    """Battleship class to hold the orientation, position, and status of ships on the board."""
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+        self.orientation = Orientation.HORIZONTAL
+        self.position = (0, 0)
+        self.hits = 0
+        self.sunk = False
+        # The turn of the game the ship sank on, or None if it is afloat.
+        self.sunk_turn = None
+
+    def get_sunk(self):
+        """
+        Gets whether the ship is sunk or not.
+
+        Returns:
+            bool: The value of the sunk variable.
+        """
+        return self.sunk
+
+    def set_sunk(self, sunk):
+        """
+        Updates the sunk variable of the ship to a boolean value.
+
+        Parameters:
+            sunk (bool): The new value for the sunk variable.
+        """
+
+        self.sunk = sunk
+
+    def get_orientation(self):
+        """
+        Gets the orientation of the ship.
+
+        Returns:
+            Orientation: The orientation enum value of the orientation variable.
+        """
+
+        return self.orientation
+
+    def set_orientation(self, orientation):
+        """
+        Updates the orientation variable of the ship either to HORIZONTAL or VERTICAL.
+
+        Parameters:
+            orientation (Orientation): The new orientation of the ship.
+        """
+        self.orientation = orientation
+
+    def get_position(self):
+        """
+        Gets the position of the ship.
+
+        Returns:
+            (tuple): The value of the position variable.
+        """
+
+        return self.position
+
+    def set_position(self, position):
+        """
+        Updates the position variable of the ship.
+
+        Parameters:
+            position (tuple): The new position.
+        """
+        self.position = position
+
+    def get_sunk_turn(self):
+        """
+        Gets the turn the ship sank on.
+
+        Returns:
+            int: The value of the sunk_turn variable, or None if the ship hasn't sunk.
+        """
+        return self.sunk_turn
+
+    def hit(self):
+        """
+        Adds to hits count. The game manager sinks the ship when it has been hit in every cell.
+
+        Returns:
+            bool: True if the ship has been hit in every cell, False otherwise.
+        """
+        self.hits += 1
+        return self.hits >= self.size
+
+class BatchEngine:
+    """
+    Plays many games in lockstep with NumPy arrays instead of one GameManager loop per game.
+
+    The ships of K games are held as a (K, height, width) array of ship numbers, and every step
+    picks and resolves one shot for each game still running. Finished games drop out of the
+    arrays. The "basic" and "density" strategies follow the same rules as hunt_basic/target_basic
+    and DensityPolicy.hunt/DensityPolicy.target, so the stats match the scalar hunter's
+    statistically.
+    Placements are never listed: a ship's placements are the runs of cells starting at each cell,
+    found by adding up shifted copies of the boards, so memory grows with the board's cells, not
+    with placements times cells. NumPy is imported on first use, like pygame in GameUI.
+    """
+
+    # The strategies the engine plays, each its own hunt and target policy.
+    STRATEGIES = ("basic", "density")
+
+    def __init__(self, k, config=None, strategy="basic", seed=None):
+
+        global np
+        import numpy as np
+
+        self.k = k
+        self.config = config or GameConfig()
+        self.strategy = BatchEngine.policy(strategy)
+        self.rng = np.random.default_rng(seed)
+        width, height = self.config.width, self.config.height
+        self.cells = width * height
+        self.sizes = np.array([size for ship_cell, name, size in self.config.ships])
+        self.names = [name for ship_cell, name, size in self.config.ships]
+        checkerboard = checkerboard_mask(width, height)
+        self.checkerboard = np.array([bool(checkerboard >> cell & 1) for cell in range(self.cells)])
+        # For each direction in target_basic's order, the neighbor of every cell and whether it
+        # is in bounds.
+        x, y = np.arange(self.cells) % width, np.arange(self.cells) // width
+        self.neighbors = []
+        for direction_x, direction_y in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+
+            neighbor_x, neighbor_y = x + direction_x, y + direction_y
+            in_bounds = (neighbor_x >= 0) & (neighbor_x < width) & (neighbor_y >= 0) & (neighbor_y < height)
+            self.neighbors.append((np.where(in_bounds, neighbor_y * width + neighbor_x, 0), in_bounds))
+
+    @staticmethod
+    def policy(strategy):
+        """
+        Finds the engine's policy for a strategy name.
+
+        Parameters:
+            strategy (str): The strategy, such as "density" or "density:density".
+        Returns:
+            str: The name of the policy, one of STRATEGIES.
+        Raises:
+            ValueError: If the engine can't play the strategy.
+        """
+        hunt_name, target_name, endgame = split_strategy(strategy)
+        if hunt_name != target_name or hunt_name not in BatchEngine.STRATEGIES or endgame:
+
+            raise ValueError("--engine numpy only plays the " + " and ".join(BatchEngine.STRATEGIES) +
+                             " strategies, not " + strategy)
+
+        return hunt_name
+
+    def run_sums(self, grids, size):
+        """
+        Adds up the cells of every run of size cells, in each of a batch of grids.
+
+        Parameters:
+            grids (ndarray): The (K, cells) values, such as 1 for each blocked cell.
+            size (int): The length of the runs.
+        Returns:
+            tuple: The (K, height, width - size + 1) sums of the horizontal runs and the
+            (K, height - size + 1, width) sums of the vertical ones, each indexed by its first cell.
+        """
+        width, height = self.config.width, self.config.height
+        grids = grids.reshape(-1, height, width).astype(np.int16)
+        horizontal = grids[:, :, :width - size + 1].copy()
+        vertical = grids[:, :height - size + 1, :].copy()
+        for i in range(1, size):
+
+            horizontal += grids[:, :, i:width - size + 1 + i]
+            vertical += grids[:, i:height - size + 1 + i, :]
+
+        return horizontal, vertical
+
+    def run_coverage(self, horizontal, vertical, size):
+        """
+        Counts, for each cell, the runs covering it, given a count for every run.
+
+        Parameters:
+            horizontal (ndarray): The count of each horizontal run, as from run_sums().
+            vertical (ndarray): The count of each vertical run.
+            size (int): The length of the runs.
+        Returns:
+            ndarray: The (K, cells) counts.
+        """
+        width, height = self.config.width, self.config.height
+        counts = np.zeros((horizontal.shape[0], height, width), dtype=np.float32)
+        for i in range(size):
+
+            counts[:, :, i:width - size + 1 + i] += horizontal
+            counts[:, i:height - size + 1 + i, :] += vertical
+
+        return counts.reshape(horizontal.shape[0], -1)
+
+    def place_fleets(self):
+        """
+        Places a fleet on each of the K boards, each ship uniformly among its open placements.
+
+        Returns:
+            ndarray: The (K, height, width) boards, holding 0 for empty cells and i + 1 for
+            cells of the i-th ship in config.ships.
+        Raises:
+            ValueError: If a ship has no open placement left on some board.
+        """
+        width = self.config.width
+        boards = np.zeros((self.k, self.cells), dtype=np.int16)
+        rows = np.arange(self.k)
+        for number, size in enumerate(self.sizes.tolist(), 1):
+
+            horizontal, vertical = self.run_sums(boards > 0, size)
+            open_placements = np.concatenate([(horizontal == 0).reshape(self.k, -1),
+                                              (vertical == 0).reshape(self.k, -1)], axis=1)
+            if not open_placements.any(axis=1).all():
+
+                raise ValueError("No room left on the board for a ship of size " + str(size))
+
+            # The open placement with the largest random key is a uniform choice among them.
+            chosen = self.random_choice(open_placements)
+            # Turn the chosen run back into its first cell and the step between its cells.
+            runs = horizontal[0].size
+            is_vertical = chosen >= runs
+            run = np.where(is_vertical, chosen - runs, chosen)
+            run_width = np.where(is_vertical, width, width - size + 1)
+            start = run // run_width * width + run % run_width
+            step = np.where(is_vertical, width, 1)
+            for i in range(size):
+
+                boards[rows, start + i * step] = number
+
+        return boards.reshape(self.k, self.config.height, width)
+
+    def run(self):
+        """
+        Plays the K games to the end.
+
+        Returns:
+            dict: The shots_hit, total_shots, accuracies and hunt_fallbacks lists, one entry
+            per game.
+        """
+        boards = self.place_fleets().reshape(self.k, -1)
+        fired = np.zeros((self.k, self.cells), dtype=bool)
+        # The turn each cell was fired at, used to replay target_basic's hit order.
+        fire_turn = np.full((self.k, self.cells), np.iinfo(np.int32).max, dtype=np.int32)
+        remaining = np.tile(self.sizes, (self.k, 1))
+        # The turn each ship was first hit, used to replay the order of the hits dictionary.
+        found = np.full(remaining.shape, np.iinfo(np.int32).max, dtype=np.int32)
+        shots_hit = np.zeros(self.k, dtype=np.int64)
+        total_shots = np.zeros(self.k, dtype=np.int64)
+        hunt_fallbacks = np.zeros(self.k, dtype=np.int64)
+        # The turn each ship sank, counted from 1 like GameManager.turn.
+        sink_turns = np.zeros(remaining.shape, dtype=np.int64)
+        games = np.arange(self.k)
+        state = [boards, fired, fire_turn, remaining, found]
+        turn = 0
+        while games.size:
+
+            boards, fired, fire_turn, remaining, found = state
+            rows = np.arange(games.size)
+            # Ships that have been hit but not sunk.
+            targeted = (remaining < self.sizes) & (remaining > 0)
+            if self.strategy == "density":
+
+                shots, fallbacks = self.choose_density(boards, fired, remaining, targeted)
+
+            else:
+
+                shots, fallbacks = self.choose_basic(boards, fired, fire_turn, found, targeted)
+            # Resolve every shot at once.
+            ships = boards[rows, shots]
+            fired[rows, shots] = True
+            fire_turn[rows, shots] = turn
+            hit = ships > 0
+            hit_rows, hit_ships = rows[hit], ships[hit] - 1
+            remaining[hit_rows, hit_ships] -= 1
+            sunk = remaining[hit_rows, hit_ships] == 0
+            sink_turns[games[hit_rows[sunk]], hit_ships[sunk]] = turn + 1
+            found[hit_rows, hit_ships] = np.minimum(found[hit_rows, hit_ships], turn)
+            shots_hit[games] += hit
+            total_shots[games] += 1
+            hunt_fallbacks[games] += fallbacks
+            # Drop the finished games from the active set.
+            done = (remaining == 0).all(axis=1)
+            if done.any():
+
+                games = games[~done]
+                state = [array[~done] for array in state]
+
+            turn += 1
+
+        return {
+            "shots_hit": shots_hit.tolist(),
+            "total_shots": total_shots.tolist(),
+            "accuracies": (shots_hit / total_shots * 100).tolist(),
+            "hunt_fallbacks": hunt_fallbacks.tolist(),
+            "sink_turns": [dict(zip(self.names, turns)) for turns in sink_turns.tolist()],
+        }
+
+    def random_choice(self, candidates):
+        """Picks a uniformly random True column in each row of a boolean array."""
+        return np.where(candidates, self.rng.random(candidates.shape), -1.0).argmax(axis=1)
+
+    def choose_basic(self, boards, fired, fire_turn, found, targeted):
+        """
+        Picks each game's shot like target_basic and hunt_basic.
+
+        Targeting games take the first discovered ship still afloat, then its earliest hit with
+        an empty neighbor, then the first empty neighbor in left, right, up, down order.
+        Hunting games choose a random empty checkerboard cell.
+
+        Returns:
+            tuple: The chosen cell of each game and whether it fell back to hunting.
+        """
+        unknown = ~fired
+        shots = self.random_choice(unknown & self.checkerboard)
+        fallbacks = np.zeros(len(shots), dtype=bool)
+        targeting = np.flatnonzero(targeted.any(axis=1))
+        if not targeting.size:
+
+            return shots, fallbacks
+
+        big = np.iinfo(np.int32).max
+        ship = np.where(targeted[targeting], found[targeting], big).argmin(axis=1) + 1
+        own_hits = fired[targeting] & (boards[targeting] == ship[:, None])
+        available = [in_bounds & unknown[targeting][:, neighbor] for neighbor, in_bounds in self.neighbors]
+        any_available = available[0] | available[1] | available[2] | available[3]
+        order = np.where(own_hits & any_available, fire_turn[targeting], big)
+        cell = order.argmin(axis=1)
+        rows = np.arange(targeting.size)
+        has_target = order[rows, cell] != big
+        choice = np.full(targeting.size, -1)
+        for (neighbor, in_bounds), direction_available in zip(reversed(self.neighbors), reversed(available)):
+
+            choice = np.where(direction_available[rows, cell], neighbor[cell], choice)
+
+        shots[targeting[has_target]] = choice[has_target]
+        fallbacks[targeting[~has_target]] = True
+        return shots, fallbacks
+
+    def choose_density(self, boards, fired, remaining, targeted):
+        """
+        Picks each game's shot like DensityPolicy.target and DensityPolicy.hunt.
+
+        A placement of a ship is legal if it covers no miss, no cell of another ship and every
+        hit on that ship. Hunting games fire at the empty cell with the most legal placements of
+        all ships afloat, targeting games at the one with the most placements of the ships that
+        have been hit. Ties are broken at random.
+
+        Returns:
+            tuple: The chosen cell of each game and whether it fell back to hunting.
+        """
+        unknown = ~fired
+        counts = np.zeros(fired.shape, dtype=np.float32)
+        target_counts = np.zeros(fired.shape, dtype=np.float32)
+        for ship, size in enumerate(self.sizes.tolist()):
+
+            afloat = remaining[:, ship] > 0
+            if not afloat.any():
+
+                continue
+
+            own = fired & (boards == ship + 1)
+            hits = own.sum(axis=1)[:, None, None] * afloat[:, None, None]
+            legal = []
+            for blocked, covered in zip(self.run_sums(fired & ~own, size), self.run_sums(own, size)):
+
+                legal.append((blocked == 0) & (covered == hits) & afloat[:, None, None])
+
+            ship_counts = self.run_coverage(*legal, size)
+            counts += ship_counts
+            target_counts += ship_counts * targeted[:, ship, None]
+        # Break ties with a random fraction, which can't reorder whole counts.
+        noise = self.rng.random(fired.shape, dtype=np.float32) * 0.5
+        targeting = targeted.any(axis=1)
+        target_counts = np.where(unknown, target_counts, 0)
+        has_target = (target_counts > 0).any(axis=1)
+        use_target = targeting & has_target
+        scores = np.where(use_target[:, None], target_counts, counts)
+        shots = np.where(unknown, scores + noise, -1.0).argmax(axis=1)
+        return shots, targeting & ~has_target
+
+
+def run_simulations(n, strategy="basic", seed=None, config=None, record=None, store=None, first_game=1,
+                    profiler=None, placement=None):
+    """
+    Plays n games headlessly, without pygame, sleeping or logging, and returns their stats.
+
+    Parameters:
+        n (int): The number of games to play.
+        strategy (str): The name of the hunter strategy, such as "basic".
+        seed (int): The master seed, or None to pick one at random.
+        config (GameConfig): The board size and fleet, defaulting to the standard game.
+        record (str): A file to record the games to, or None.
+        store (ResultsStore): A store to write the stats to instead of returning them, or None.
+        first_game (int): The number of the first game. Games are numbered from it, and each
+            game's randomness depends only on the seed and its number.
+        profiler (Profiler): A profiler to time the games' phases with, or None.
+        placement (AdversarialPlacement): The placement to draw the fleets from, or None to place
+            them uniformly.
+    Returns:
+        dict: The shots_hit, total_shots, accuracies, hunt_fallbacks and sink_turns lists, one
+        entry per game, which are empty if a store is given.
+    """
+    game_manager = GameManager(headless=True, strategy=strategy, config=config, seed=seed, game_num=first_game)
+    if record is not None:
+
+        game_manager.recorder = Recorder(record, game_manager.config)
+
+    game_manager.results_store = store
+    game_manager.placement = placement
+    if profiler is not None:
+
+        profiler.attach(game_manager)
+
+    for _ in range(n):
+
+        game_manager.run_game()
+        game_manager.game_num += 1
+
+    if record is not None:
+
+        game_manager.recorder.close()
+
+    return run_results(game_manager)
+
+
+def run_results(game_manager):
+    """Returns the per-game stats lists collected by a GameManager."""
+    return {
+        "shots_hit": game_manager.shots_hit,
+        "total_shots": game_manager.total_shots,
+        "accuracies": game_manager.accuracies,
+        "hunt_fallbacks": game_manager.hunt_fallbacks,
+        "sink_turns": game_manager.sink_turns,
+    }
+
+
+class GameStats:
+    """
+    Streaming per-game stats kept in memory: the running mean and variance of each stat and a
+    histogram of total shots. It has the same append() as ResultsStore, so either can be a
+    GameManager's results_store.
+    """
+
+    def __init__(self):
+
+        self.count = 0
+        self.stats = {name: RunningStats() for name, typecode in ResultsStore.COLUMNS}
+        # The number of games won in each number of total shots.
+        self.histogram = {}
+
+    def append(self, shots_hit, total_shots, accuracy, hunt_fallbacks):
+        """Adds the stats of one game."""
+        self.count += 1
+        for stats, value in zip(self.stats.values(), (shots_hit, total_shots, accuracy, hunt_fallbacks)):
+
+            stats.add(value)
+
+        self.histogram[total_shots] = self.histogram.get(total_shots, 0) + 1
+
+
+def compare_strategies(strategy_a, strategy_b, confidence=0.95, batch=100, min_games=200,
+                       max_games=100000, seed=None, config=None):
+    """
+    Plays games of two strategies in batches until their mean total shots differ with the given
+    confidence, or max_games games of each have been played.
+
+    Both strategies play the same games: their managers share a master seed, so game n has the
+    same fleet for each. The test is on the per-game differences in total shots, which vary far
+    less than the totals themselves. After each batch a two-sided z-test is run on the mean
+    difference. Each test is made at the Bonferroni-corrected level for the largest possible
+    number of tests, so stopping at the first significant result keeps the overall error rate
+    within 1 - confidence.
+
+    Parameters:
+        strategy_a (str): The first strategy.
+        strategy_b (str): The second strategy.
+        confidence (float): The confidence needed to stop, such as 0.95.
+        batch (int): The number of games of each strategy between tests.
+        min_games (int): The number of games of each strategy before the first test.
+        max_games (int): The most games of each strategy to play.
+        seed (int): The master seed, or None to pick one at random.
+        config (GameConfig): The board size and fleet, defaulting to the standard game.
+    Returns:
+        dict: The games played per strategy, both means, the difference (a - b) and its
+        confidence interval, and the winner ("a", "b" or None if the result is inconclusive).
+    """
+    if seed is None:
+
+        seed = random.randrange(2 ** 64)
+
+    managers = []
+    for strategy in (strategy_a, strategy_b):
+
+        game_manager = GameManager(headless=True, strategy=strategy, config=config, seed=seed)
+        game_manager.results_store = GameStats()
+        managers.append(game_manager)
+
+    differences = RunningStats()
+    tests = max(1, (max_games - min_games) // batch + 1)
+    level = 1 - (1 - confidence) / tests
+    winner = None
+    while True:
+
+        for _ in range(batch):
+
+            totals = []
+            for game_manager in managers:
+
+                game_manager.run_game()
+                game_manager.game_num += 1
+                totals.append(game_manager.battleship_hunter.total_shots)
+
+            differences.add(totals[0] - totals[1])
+
+        stats_a, stats_b = (game_manager.results_store.stats["total_shots"] for game_manager in managers)
+        if stats_a.count < min_games:
+
+            continue
+
+        interval = differences.confidence_interval(level)
+        if interval[0] > 0 or interval[1] < 0:
+
+            winner = "a" if differences.mean < 0 else "b"
+
+        if winner is not None or stats_a.count >= max_games:
+
+            break
+
+    return {
+        "games": stats_a.count,
+        "mean_a": stats_a.mean,
+        "mean_b": stats_b.mean,
+        "difference": differences.mean,
+        "interval": interval,
+        "winner": winner,
+    }
+
+
+class MatchSide:
+    """
+    One player's side of a head-to-head match: the hidden fleet that the other player's hunter
+    fires at.
+
+    It holds only the state that GameManager's placement and shot methods use, and borrows those
+    methods, so a match runs on the same engine as a headless game without two full
+    GameManagers. Each side draws its fleet from its own stream of the match's seed.
+    """
+
+    place_ships = GameManager.place_ships
+    check_hit = GameManager.check_hit
+    sink_ship = GameManager.sink_ship
+    ships_left = GameManager.ships_left
+
+    def __init__(self, name, config, seed):
+
+        self.name = name
+        self.config = config
+        self.seed = seed
+        self.game_num = 1
+        self.ships = {ship_cell: Battleship(ship_name, size) for ship_cell, ship_name, size in config.ships}
+        self.sampler = FleetSampler(config.width, config.height, [size for _, _, size in config.ships])
+        self.placement = None
+
+    def game_rng(self, stream):
+        """
+        Creates this side's random stream of the current match for one purpose.
+
+        Parameters:
+            stream (str): The purpose of the stream, such as "placement" or "hunter".
+        Returns:
+            Random: A generator seeded from the seed, the match number, the side and the stream.
+        """
+        return random.Random(game_seed(self.seed, self.game_num, self.name + ":" + stream))
+
+
+def play_match(side_a, side_b, strategy_a, strategy_b):
+    """
+    Plays one match, with the two players firing in turns until a fleet is sunk.
+
+    Player a fires first, so the round is always finished: if b sinks a's fleet with its reply
+    to a's winning shot, both took the same number of shots and the match is a draw.
+
+    Parameters:
+        side_a (MatchSide): Player a's fleet, which b fires at.
+        side_b (MatchSide): Player b's fleet, which a fires at.
+        strategy_a (str): Player a's hunter strategy.
+        strategy_b (str): Player b's hunter strategy.
+    Returns:
+        str: "a" or "b" for the winner, or "draw".
+    """
+    side_a.place_ships()
+    side_b.place_ships()
+    # Each hunter plays against the other side's fleet, with its own side's random stream.
+    players = ((BattleshipHunter(side_b, strategy_a, side_a.game_rng("hunter")), side_b),
+               (BattleshipHunter(side_a, strategy_b, side_b.game_rng("hunter")), side_a))
+    while side_a.ships_remaining > 0 and side_b.ships_remaining > 0:
+
+        for hunter, target in players:
+
+            position = hunter.take_turn()
+            result = target.check_hit(position)
+            if result != ShipCell.MISS:
+
+                hunter.on_hit(result, position)
+
+            else:
+
+                hunter.on_miss(position)
+
+    if side_a.ships_remaining == side_b.ships_remaining:
+
+        return "draw"
+
+    return "a" if side_b.ships_remaining == 0 else "b"
+
+
+def run_matches(n, strategy_a, strategy_b, seed=None, config=None, first_match=1):
+    """
+    Plays n head-to-head matches between two strategies headlessly.
+
+    Parameters:
+        n (int): The number of matches to play.
+        strategy_a (str): Player a's hunter strategy.
+        strategy_b (str): Player b's hunter strategy.
+        seed (int): The master seed, or None to pick one at random.
+        config (GameConfig): The board size and fleet of both players, defaulting to the
+            standard game.
+        first_match (int): The number of the first match. Each match's fleets and hunters
+            depend only on the seed and its number.
+    Returns:
+        dict: The wins of a and b, the draws, and the shots each player fired in each match.
+    """
+    config = config or GameConfig()
+    seed = random.randrange(2 ** 64) if seed is None else seed
+    Log.set_level(LogLevel.OFF)
+    side_a = MatchSide("a", config, seed)
+    side_b = MatchSide("b", config, seed)
+    results = {"a": 0, "b": 0, "draw": 0, "shots": []}
+    for match_num in range(first_match, first_match + n):
+
+        side_a.game_num = side_b.game_num = match_num
+        results[play_match(side_a, side_b, strategy_a, strategy_b)] += 1
+        # Both players fire in every round, so each fired the same number of shots.
+        results["shots"].append(side_b.turn)
+
+    return results
+
+
+def rank_strategies(strategies, n, seed=None, config=None):
+    """
+    Ranks strategies by their win rate in a round robin of head-to-head matches.
+
+    Every pair plays n matches from the same seed, and a draw counts as half a win.
+
+    Parameters:
+        strategies (list): The strategy names.
+        n (int): The number of matches each pair plays.
+        seed (int): The master seed, or None to pick one at random.
+        config (GameConfig): The board size and fleet, defaulting to the standard game.
+    Returns:
+        list: A (strategy, win rate, wins, draws, losses) tuple per strategy, best first.
+    """
+    seed = random.randrange(2 ** 64) if seed is None else seed
+    records = {strategy: [0, 0, 0] for strategy in strategies}
+    for i, strategy_a in enumerate(strategies):
+
+        for strategy_b in strategies[i + 1:]:
+
+            results = run_matches(n, strategy_a, strategy_b, seed, config)
+            for strategy, won, lost in ((strategy_a, "a", "b"), (strategy_b, "b", "a")):
+
+                records[strategy][0] += results[won]
+                records[strategy][1] += results["draw"]
+                records[strategy][2] += results[lost]
+
+    ranking = []
+    for strategy, (wins, draws, losses) in records.items():
+
+        played = wins + draws + losses
+        ranking.append((strategy, (wins + draws / 2) / max(played, 1), wins, draws, losses))
+
+    return sorted(ranking, key=lambda entry: -entry[1])
+
+
+def tune_placement(strategy, rounds, n, temperature=2.0, seed=None, config=None):
+    """
+    Tunes an AdversarialPlacement against a strategy.
+
+    The first round plays n games with uniform placement, and every later round plays n games with
+    a placement built from the ShotHeatMap of the round before it. Every round's games are new, so
+    each placement is judged on games it wasn't built from.
+
+    Parameters:
+        strategy (str): The strategy to place ships against.
+        rounds (int): The number of rounds, including the uniform one.
+        n (int): The number of games per round.
+        temperature (float): The temperature of every AdversarialPlacement.
+        seed (int): The master seed, or None to pick one at random.
+        config (GameConfig): The board size and fleet, defaulting to the standard game.
+    Returns:
+        tuple: The placement with the highest mean total shots, or None if no round beat uniform
+        placement, and the mean total shots of each round.
+    """
+    game_manager = GameManager(headless=True, strategy=strategy, config=config, seed=seed)
+    config = game_manager.config
+    best, best_shots = None, 0
+    history = []
+    for _ in range(rounds):
+
+        heat_map = ShotHeatMap(config.width, config.height)
+        game_manager.recorder = heat_map
+        game_manager.results_store = GameStats()
+        for _ in range(n):
+
+            game_manager.run_game()
+            game_manager.game_num += 1
+
+        history.append(game_manager.results_store.stats["total_shots"].mean)
+        if history[-1] > best_shots:
+
+            best, best_shots = game_manager.placement, history[-1]
+
+        game_manager.placement = AdversarialPlacement(heat_map, config, temperature)
+
+    return best, history
+
+
+def run_batch(n, strategy="basic", seed=None, config=None, batch_size=4096):
+    """
+    Plays n games with the NumPy BatchEngine, batch_size games at a time.
+
+    Parameters:
+        n (int): The number of games to play.
+        strategy (str): "basic" or "density".
+        seed (int): Seed for NumPy's generator, or None for a random one.
+        config (GameConfig): The board size and fleet, defaulting to the standard game.
+        batch_size (int): The number of games played in lockstep.
+    Returns:
+        dict: The same stats lists as run_simulations().
+    """
+    results = {"shots_hit": [], "total_shots": [], "accuracies": [], "hunt_fallbacks": [], "sink_turns": []}
+    for batch, start in enumerate(range(0, n, batch_size)):
+
+        batch_seed = None if seed is None else [seed, batch]
+        engine = BatchEngine(min(batch_size, n - start), config, strategy, batch_seed)
+        for key, values in engine.run().items():
+
+            results[key].extend(values)
+
+    return results
+
+
+def run_shard(job):
+    """
+    Runs one shard of a tournament. Module-level so that worker processes can unpickle it.
+
+    Parameters:
+        job (tuple): The number of games, the strategy name, the tournament seed, the GameConfig
+            and the number of the shard's first game.
+    Returns:
+        dict: The stats lists returned by run_simulations().
+    """
+    n, strategy, seed, config, first_game = job
+    return run_simulations(n, strategy, seed, config, first_game=first_game)
+
+
+def run_tournament(n, strategy="basic", seed=None, workers=None, shard_size=1000, config=None):
+    """
+    Plays n headless games spread over a pool of worker processes and merges their stats.
+
+    The games are cut into shards of shard_size consecutively numbered games. Every game's
+    randomness comes from the tournament seed and its game number, and shards are merged in
+    order, so the results for a given seed depend on neither the number of workers nor the
+    shard size, and any game can be re-run on its own.
+
+    Parameters:
+        n (int): The number of games to play.
+        strategy (str): The name of the hunter strategy.
+        seed (int): The tournament seed, or None to pick one at random.
+        workers (int): The number of worker processes, defaulting to the number of cores.
+        shard_size (int): The number of games per shard.
+        config (GameConfig): The board size and fleet, defaulting to the standard game.
+    Returns:
+        tuple: The merged stats dict and the number of games played per second.
+    """
+    if seed is None:
+
+        seed = random.randrange(2 ** 64)
+
+    workers = workers or os.cpu_count() or 1
+    jobs = []
+    for start in range(0, n, shard_size):
+
+        jobs.append((min(shard_size, n - start), strategy, seed, config, start + 1))
+
+    results = {}
+    start_time = time.perf_counter()
+    # A single worker runs in-process to avoid the cost of starting a pool.
+    if workers == 1:
+
+        shards = list(map(run_shard, jobs))
+
+    else:
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+
+            shards = list(executor.map(run_shard, jobs))
+
+    for shard_results in shards:
+
+        for key, values in shard_results.items():
+
+            results.setdefault(key, []).extend(values)
+
+    elapsed = time.perf_counter() - start_time
+    return results, n / max(elapsed, 1e-9)
+
+
+class GameServer:
+    """
+    Hosts games for remote hunters over a line based protocol on a TCP or Unix socket.
+
+    Every connection is a session on one asyncio event loop, with its own headless GameManager
+    placing the fleets, so thousands of sessions can play at once. Games are numbered across the
+    server, and each game's fleet depends only on the seed and its number, like any other game.
+    Every message is one ASCII line:
+
+        server: HELLO <width> <height> <fleet>   once, with the fleet as format_fleet() writes it
+        server: GAME <number>                    at the start of each game
+        client: FIRE <x> <y>
+        server: MISS, HIT <ship> or SUNK <ship>  where ship is the ship's index in the fleet
+        server: WIN <shots>                      after the shot that sinks the last ship
+        client: NEW                              after WIN, to start the next game
+        client: QUIT                             at any time, answered with BYE
+        server: ERROR <reason>                   for a line that isn't expected or is too long,
+                                                 which is ignored
+        server: TIMEOUT                          when no line comes in move_timeout seconds
+
+    The session ends on QUIT, on a timeout or when the client disconnects.
+    """
+
+    def __init__(self, config=None, seed=None, move_timeout=5.0, results_store=None):
+
+        self.config = config or GameConfig()
+        self.seed = random.randrange(2 ** 64) if seed is None else seed
+        self.move_timeout = move_timeout
+        # Receives the stats of every won game, as a GameManager's results_store does.
+        self.results_store = results_store if results_store is not None else GameStats()
+        self.next_game = 1
+        # The number of open sessions, and of sessions closed for taking too long.
+        self.sessions = 0
+        self.timeouts = 0
+        self.server = None
+        # The index of each ship in the fleet, which is how replies name ships.
+        self.ship_numbers = {ship_cell: str(number).encode()
+                             for number, (ship_cell, name, size) in enumerate(self.config.ships)}
+        self.hello = ("HELLO %d %d %s\n" % (self.config.width, self.config.height,
+                                            self.config.format_fleet())).encode()
+        # The log level is set once for the server, as the sessions' managers leave it alone.
+        Log.set_level(LogLevel.OFF)
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """
+        Starts listening, on a Unix socket if a path is given and on TCP otherwise.
+
+        Parameters:
+            host (str): The TCP address to listen on.
+            port (int): The TCP port, or 0 to pick a free one.
+            path (str): The Unix socket path, or None.
+        Returns:
+            asyncio.Server: The listening server.
+        """
+        if path is not None:
+
+            self.server = await asyncio.start_unix_server(self.handle, path=path, backlog=4096)
+
+        else:
+
+            self.server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+
+        return self.server
+
+    def parse_shot(self, words):
+        """
+        Reads the position of a FIRE line.
+
+        Parameters:
+            words (list): The line's words, as bytes.
+        Returns:
+            tuple: The position, or None if the line isn't a shot on the board.
+        """
+        if len(words) != 3 or words[0] != b"FIRE" or not words[1].isdigit() or not words[2].isdigit():
+
+            return None
+
+        x, y = int(words[1]), int(words[2])
+        if x >= self.config.width or y >= self.config.height:
+
+            return None
+
+        return x, y
+
+    async def receive(self, reader, writer):
+        """
+        Sends the replies so far and waits up to move_timeout for the client's next line.
+
+        Parameters:
+            reader (asyncio.StreamReader): The connection's incoming side.
+            writer (asyncio.StreamWriter): The connection's outgoing side.
+        Returns:
+            list: The words of the line, as bytes, or None if the session is over.
+        """
+        await writer.drain()
+        while True:
+
+            try:
+
+                line = await asyncio.wait_for(reader.readline(), self.move_timeout)
+                break
+
+            except asyncio.TimeoutError:
+
+                self.timeouts += 1
+                writer.write(b"TIMEOUT\n")
+                return None
+
+            except ValueError:
+
+                # readline() discards a line over the stream's limit and raises, so the session
+                # can go on.
+                writer.write(b"ERROR line too long\n")
+                await writer.drain()
+
+        words = line.split()
+        if words == [b"QUIT"]:
+
+            writer.write(b"BYE\n")
+            return None
+
+        return words if line else None
+
+    async def handle(self, reader, writer):
+        """
+        Plays games with one connected client until it quits, disconnects or times out.
+
+        Parameters:
+            reader (asyncio.StreamReader): The connection's incoming side.
+            writer (asyncio.StreamWriter): The connection's outgoing side.
+        """
+        game_manager = GameManager(headless=True, config=self.config, log_level=None, seed=self.seed)
+        self.sessions += 1
+        try:
+
+            writer.write(self.hello)
+            while True:
+
+                game_manager.game_num = self.next_game
+                self.next_game += 1
+                game_manager.place_ships()
+                writer.write(b"GAME %d\n" % game_manager.game_num)
+                shots_hit = 0
+                while game_manager.ships_remaining > 0:
+
+                    words = await self.receive(reader, writer)
+                    if words is None:
+
+                        return
+
+                    position = self.parse_shot(words)
+                    if position is None:
+
+                        writer.write(b"ERROR expected FIRE <x> <y> on the board\n")
+                        continue
+
+                    result = game_manager.check_hit(position)
+                    if result == ShipCell.MISS:
+
+                        writer.write(b"MISS\n")
+                        continue
+
+                    shots_hit += 1
+                    # Only the shot that sinks a ship is answered with SUNK.
+                    sunk = game_manager.ships[result].sunk_turn == game_manager.turn
+                    writer.write((b"SUNK " if sunk else b"HIT ") + self.ship_numbers[result] + b"\n")
+
+                self.results_store.append(shots_hit, game_manager.turn, shots_hit / game_manager.turn * 100, 0)
+                writer.write(b"WIN %d\n" % game_manager.turn)
+                while True:
+
+                    words = await self.receive(reader, writer)
+                    if words is None:
+
+                        return
+
+                    if words == [b"NEW"]:
+
+                        break
+
+                    writer.write(b"ERROR expected NEW or QUIT\n")
+
+        except ConnectionError:
+
+            return
+
+        finally:
+
+            self.sessions -= 1
+            writer.close()
+
+
+class RemoteGame:
+    """
+    Stands in for the GameManager of a hunter playing on a GameServer, which keeps the real
+    board and sinks the ships itself.
+    """
+
+    def __init__(self, config):
+
+        self.config = config
+
+    def sink_ship(self, ship):
+        """The server has already sunk the ship, so there is nothing to do."""
+
+
+async def play_remote(games, strategy="basic", seed=0, host="127.0.0.1", port=0, path=None, latency=None):
+    """
+    Connects to a GameServer and plays games on it with a BattleshipHunter.
+
+    Parameters:
+        games (int): The number of games to play before quitting.
+        strategy (str): The hunter strategy.
+        seed (int): The seed of the hunters' random streams.
+        host (str): The server's TCP address.
+        port (int): The server's TCP port.
+        path (str): The server's Unix socket path, used instead of TCP if given.
+        latency (RunningStats): Receives the round trip time of every shot in seconds, or None.
+    Returns:
+        list: The total shots of each game.
+    """
+    if path is not None:
+
+        reader, writer = await asyncio.open_unix_connection(path)
+
+    else:
+
+        reader, writer = await asyncio.open_connection(host, port)
+
+    try:
+
+        _, width, height, fleet = (await reader.readline()).decode().split()
+        remote = RemoteGame(GameConfig(int(width), int(height), GameConfig.parse_fleet(fleet)))
+        cells = [ship_cell for ship_cell, name, size in remote.config.ships]
+        total_shots = []
+        for game in range(games):
+
+            if game:
+
+                writer.write(b"NEW\n")
+
+            game_num = int((await reader.readline()).split()[1])
+            hunter = BattleshipHunter(remote, strategy, random.Random(game_seed(seed, game_num, "hunter")))
+            while hunter.ships:
+
+                position = hunter.take_turn()
+                start = time.perf_counter()
+                writer.write(b"FIRE %d %d\n" % position)
+                await writer.drain()
+                reply = (await reader.readline()).split()
+                if latency is not None:
+
+                    latency.add(time.perf_counter() - start)
+
+                if not reply or reply[0] not in (b"MISS", b"HIT", b"SUNK"):
+
+                    raise ConnectionError("unexpected reply " + repr(b" ".join(reply)))
+
+                if reply[0] == b"MISS":
+
+                    hunter.on_miss(position)
+
+                else:
+
+                    hunter.on_hit(cells[int(reply[1])], position)
+
+            total_shots.append(int((await reader.readline()).split()[1]))
+
+        writer.write(b"QUIT\n")
+        await writer.drain()
+        await reader.readline()
+        return total_shots
+
+    finally:
+
+        writer.close()
+
+
+async def run_load(sessions, games, strategy="basic", seed=0, host="127.0.0.1", port=0, path=None):
+    """
+    Plays games on a GameServer from many concurrent client sessions, as a load generator.
+
+    Parameters:
+        sessions (int): The number of clients connected at once.
+        games (int): The number of games each client plays.
+        strategy (str): The hunter strategy.
+        seed (int): The seed of the hunters' random streams.
+        host (str): The server's TCP address.
+        port (int): The server's TCP port.
+        path (str): The server's Unix socket path, used instead of TCP if given.
+    Returns:
+        dict: The games and shots played, the elapsed seconds, the mean total shots and the
+        RunningStats of the shots' round trip times.
+    """
+    # Like headless games, remote hunters play without logging.
+    Log.set_level(LogLevel.OFF)
+    latency = RunningStats()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(play_remote(games, strategy, seed, host, port, path, latency)
+                                     for _ in range(sessions)))
+    total_shots = [shots for session in results for shots in session]
+    return {
+        "games": len(total_shots),
+        "shots": sum(total_shots),
+        "elapsed": time.perf_counter() - start,
+        "mean_shots": sum(total_shots) / max(len(total_shots), 1),
+        "latency": latency,
+    }
+
+
+async def serve(server, host="127.0.0.1", port=0, path=None):
+    """
+    Runs a GameServer until it is cancelled, printing where it listens.
+
+    Parameters:
+        server (GameServer): The server to run.
+        host (str): The TCP address to listen on.
+        port (int): The TCP port.
+        path (str): The Unix socket path, used instead of TCP if given.
+    """
+    listening = await server.start(host, port, path)
+    print("Serving on " + (path or ":".join(str(part) for part in listening.sockets[0].getsockname()[:2])))
+    async with listening:
+
+        await listening.serve_forever()
+
+
+def print_store(store, elapsed=None):
+    """
+    Prints the running aggregates of a ResultsStore.
+
+    Parameters:
+        store (ResultsStore): The store to summarize.
+        elapsed (float): The wall clock time of the run in seconds, or None if unknown.
+    """
+    line = "Games: " + str(store.count)
+    if elapsed is not None:
+
+        line += " in " + str(round(elapsed, 2)) + "s (" + str(round(store.count / max(elapsed, 1e-9), 1)) + " games/sec)"
+
+    print(line)
+    for name, stats in store.stats.items():
+
+        print(name + ": mean " + str(round(stats.mean, 4)) + ", stddev " + str(round(stats.stddev(), 4)))
+
+    histogram = store.histogram.values
+    if histogram is not None and store.count:
+
+        shots = [total for total in range(len(histogram)) if histogram[total]]
+        print("Total shots histogram (" + str(shots[0]) + " to " + str(shots[-1]) + "): " +
+              " ".join(str(histogram[total]) for total in range(shots[0], shots[-1] + 1)))
+
+
+def print_results(results, elapsed):
+    """
+    Prints the averages of a batch of simulated games.
+
+    Parameters:
+        results (dict): The stats lists returned by run_simulations().
+        elapsed (float): The wall clock time the batch took, in seconds.
+    """
+    games = len(results["total_shots"])
+    print("Games: " + str(games) + " in " + str(round(elapsed, 2)) + "s (" +
+          str(round(games / max(elapsed, 1e-9), 1)) + " games/sec)")
+    if not games:
+
+        # There are no averages of no games.
+        return
+
+    print("Average Shots Hit: " + str(round(sum(results["shots_hit"]) / games, 4)))
+    print("Average Total Shots: " + str(round(sum(results["total_shots"]) / games, 4)))
+    print("Average Accuracy: " + str(round(sum(results["accuracies"]) / games, 4)))
+    print("Average Hunt Fallbacks: " + str(round(sum(results["hunt_fallbacks"]) / games, 4)))
+
+
+def benchmark_logging(number=200000):
+    """
+    Measures the per-shot cost of the game loop's log calls while logging is off, both with the
+    old eager string building and with the guarded, lazy calls.
+
+    Parameters:
+        number (int): The number of simulated shots to time.
+    Returns:
+        dict: The nanoseconds per shot of the "eager" and "lazy" versions.
+    """
+    game_manager = GameManager(headless=True)
+    game_manager.place_ships()
+    board = game_manager.board
+    Log.set_level(LogLevel.OFF)
+
+    def eager():
+        """The log calls of one shot, as run_game, check_hit and set_mode made them before."""
+        Log.log("Switching mode to " + str(Mode.HUNTING.name) + "...")
+        Log.log(str(board.get((0, 0))))
+        Log.log()
+        Log.display_board(board, "GAME")
+        Log.log("Ships Left: " + str(sum(1 for ship in game_manager.ships.values() if not ship.sunk)))
+
+    def lazy():
+        """The log calls of one shot, as they are made now."""
+        if Log.debug:
+
+            Log.log("Switching mode to %s...", Mode.HUNTING.name, level=LogLevel.DEBUG)
+
+        if Log.debug:
+
+            Log.log("%s", board.get((0, 0)), level=LogLevel.DEBUG)
+
+        if Log.debug:
+
+            Log.log(level=LogLevel.DEBUG)
+            Log.display_board(board, "GAME")
+            Log.log("Ships Left: %d", game_manager.ships_left(), level=LogLevel.DEBUG)
+
+    results = {}
+    for name, shot in (("eager", eager), ("lazy", lazy)):
+
+        start = time.perf_counter_ns()
+        for _ in range(number):
+
+            shot()
+
+        results[name] = (time.perf_counter_ns() - start) / number
+
+    return results
+
+
+def time_per_call(function, calls, repeat=5):
+    """
+    Times a function over a list of argument tuples and returns the mean cost of one call.
+
+    Like timeit, the fastest of several runs is kept, since slower runs only add noise from the
+    rest of the machine. The cost of the loop itself, measured by calling a function that does
+    nothing over the same arguments, is taken off, so the result is close to the cost of the
+    call alone.
+
+    Parameters:
+        function (function): The function to time.
+        calls (list): One tuple of arguments per call.
+        repeat (int): The number of runs over the calls.
+    Returns:
+        float: The mean nanoseconds per call.
+    """
+    def nothing(*args):
+
+        pass
+
+    timings = []
+    for timed in (nothing, function):
+
+        fastest = None
+        for _ in range(repeat):
+
+            start = time.perf_counter_ns()
+            for call in calls:
+
+                timed(*call)
+
+            elapsed = time.perf_counter_ns() - start
+            fastest = elapsed if fastest is None else min(fastest, elapsed)
+
+        timings.append(fastest)
+
+    return max(0.0, (timings[1] - timings[0]) / len(calls))
+
+
+def shot_distribution(total_shots):
+    """
+    Summarizes the shots it took to win a batch of games.
+
+    Parameters:
+        total_shots (list): The total shots of each game.
+    Returns:
+        dict: The mean, standard deviation, minimum, maximum, percentiles and a histogram
+        mapping each number of shots to the games won in it.
+    """
+    stats = RunningStats()
+    histogram = {}
+    for shots in total_shots:
+
+        stats.add(shots)
+        histogram[shots] = histogram.get(shots, 0) + 1
+
+    ordered = sorted(total_shots)
+    return {
+        "mean": stats.mean,
+        "stddev": stats.stddev(),
+        "min": ordered[0],
+        "max": ordered[-1],
+        "percentiles": {str(percent): ordered[min(len(ordered) - 1, len(ordered) * percent // 100)]
+                        for percent in (5, 25, 50, 75, 95)},
+        "histogram": {str(shots): histogram[shots] for shots in sorted(histogram)},
+    }
+
+
+def benchmark_calls(strategy, seed, config, number=20000):
+    """
+    Measures the per-call cost of the engine's hot paths for one strategy.
+
+    check_hit is timed sweeping every cell of freshly placed boards, can_place over random
+    placements of the fleet, and is_empty and in_bounds on a hunter part way through a game.
+
+    Parameters:
+        strategy (str): The name of the hunter strategy.
+        seed (int): The master seed.
+        config (GameConfig): The board size and fleet.
+        number (int): The rough number of calls to time for each method.
+    Returns:
+        dict: The nanoseconds per call of each method.
+    """
+    game_manager = GameManager(headless=True, strategy=strategy, config=config, seed=seed)
+    config = game_manager.config
+    rng = random.Random(seed)
+    cells = [(x, y) for y in range(config.height) for x in range(config.width)]
+    results = {}
+
+    # check_hit changes the game, so each sweep gets a new board, placed outside the timing.
+    check_hit = 0.0
+    sweeps = max(1, number // len(cells))
+    for game_num in range(sweeps):
+
+        game_manager.game_num = game_num + 1
+        game_manager.place_ships()
+        check_hit += time_per_call(game_manager.check_hit, [(cell,) for cell in cells], 1)
+
+    results["check_hit"] = check_hit / sweeps
+
+    ships = []
+    for _ in range(number):
+
+        name, size = rng.choice([(name, size) for _, name, size in config.ships])
+        ship = Battleship(name, size)
+        ship.set_orientation(rng.choice([Orientation.HORIZONTAL, Orientation.VERTICAL]))
+        ship.set_position((rng.randrange(config.width), rng.randrange(config.height)))
+        ships.append((ship,))
+
+    results["can_place"] = time_per_call(game_manager.can_place, ships)
+    results["place_ships"] = time_per_call(game_manager.place_ships, [()] * max(1, number // 10))
+
+    # Play part of a game, so the hunter's board has misses and hits on it.
+    hunter = BattleshipHunter(game_manager, strategy, game_manager.game_rng("hunter"))
+    for _ in range(len(cells) // 4):
+
+        call = hunter.take_turn()
+        result = game_manager.check_hit(call)
+        if result != ShipCell.MISS:
+
+            hunter.on_hit(result, call)
+
+        else:
+
+            hunter.on_miss(call)
+
+    positions = [(rng.choice(cells),) for _ in range(number)]
+    results["is_empty"] = time_per_call(hunter.is_empty, positions)
+    positions = [((rng.randrange(-1, config.width + 1), rng.randrange(-1, config.height + 1)),)
+                 for _ in range(number)]
+    results["in_bounds"] = time_per_call(hunter.in_bounds, positions)
+    return results
+
+
+def benchmark_turns(strategy, games, seed, config):
+    """
+    Measures the mean time of the hunter's take_turn over whole games.
+
+    The games are played like run_game plays them headlessly, with only take_turn timed.
+
+    Parameters:
+        strategy (str): The name of the hunter strategy.
+        games (int): The number of games to play.
+        seed (int): The master seed.
+        config (GameConfig): The board size and fleet.
+    Returns:
+        float: The mean nanoseconds per take_turn call.
+    """
+    game_manager = GameManager(headless=True, strategy=strategy, config=config, seed=seed)
+    elapsed = 0
+    turns = 0
+    for game_num in range(games):
+
+        game_manager.game_num = game_num + 1
+        game_manager.place_ships()
+        hunter = BattleshipHunter(game_manager, strategy, game_manager.game_rng("hunter"))
+        while game_manager.ships_remaining > 0:
+
+            start = time.perf_counter_ns()
+            call = hunter.take_turn()
+            elapsed += time.perf_counter_ns() - start
+            result = game_manager.check_hit(call)
+            if result != ShipCell.MISS:
+
+                hunter.on_hit(result, call)
+
+            else:
+
+                hunter.on_miss(call)
+
+        turns += game_manager.turn
+
+    return elapsed / turns
+
+
+def run_benchmarks(strategies=None, games=1000, seed=0, config=None, turn_games=200):
+    """
+    Runs the benchmark suite: speed, turn cost, hot path costs and shots to win per strategy.
+
+    Every strategy plays the same games from a fixed seed, so the shots to win only change when
+    a strategy's play changes, while the timings vary with the machine.
+
+    Parameters:
+        strategies (list): The strategy names, defaulting to every registered hunt:target pair.
+        games (int): The number of games each strategy plays for its speed and shots.
+        seed (int): The master seed.
+        config (GameConfig): The board size and fleet, defaulting to the standard game.
+        turn_games (int): The number of games take_turn is timed over.
+    Returns:
+        dict: The results, which save to JSON as they are.
+    """
+    config = config or GameConfig()
+    results = {
+        "seed": seed,
+        "games": games,
+        "width": config.width,
+        "height": config.height,
+        "fleet": config.format_fleet(),
+        "python": sys.version.split()[0],
+        "logging_ns": benchmark_logging(),
+        "strategies": {},
+    }
+    for strategy in strategies or strategy_names():
+
+        start = time.perf_counter()
+        stats = run_simulations(games, strategy, seed, config)
+        elapsed = time.perf_counter() - start
+        results["strategies"][strategy] = {
+            "games_per_sec": games / max(elapsed, 1e-9),
+            "take_turn_ns": benchmark_turns(strategy, min(games, turn_games), seed, config),
+            "calls_ns": benchmark_calls(strategy, seed, config),
+            "shots": shot_distribution(stats["total_shots"]),
+        }
+
+    return results
+
+
+def compare_benchmarks(results, baseline, threshold=0.2, shots_threshold=0.01):
+    """
+    Compares benchmark results against a baseline and lists the regressions.
+
+    A timing regresses when it is slower than the baseline's by more than threshold, as a
+    fraction. Shots to win are only compared when both runs played the same games, and regress
+    when the mean rises by more than shots_threshold.
+
+    Parameters:
+        results (dict): The results of run_benchmarks().
+        baseline (dict): Earlier results of run_benchmarks().
+        threshold (float): The allowed slowdown.
+        shots_threshold (float): The allowed rise in mean shots to win.
+    Returns:
+        list: One message per regression, empty if there are none.
+    """
+    same_games = all(results[key] == baseline.get(key) for key in ("seed", "games", "width", "height", "fleet"))
+    regressions = []
+    for strategy, current in results["strategies"].items():
+
+        previous = baseline["strategies"].get(strategy)
+        if previous is None:
+
+            continue
+
+        # Each timing as (name, current, baseline), with larger values meaning slower.
+        timings = [("games/sec", 1 / current["games_per_sec"], 1 / previous["games_per_sec"]),
+                   ("take_turn", current["take_turn_ns"], previous["take_turn_ns"])]
+        timings += [(name, nanoseconds, previous["calls_ns"][name])
+                    for name, nanoseconds in current["calls_ns"].items() if name in previous["calls_ns"]]
+        for name, now, before in timings:
+
+            if before and now > before * (1 + threshold):
+
+                regressions.append(strategy + " " + name + " is " +
+                                   str(round((now / before - 1) * 100, 1)) + "% slower")
+
+        mean, before = current["shots"]["mean"], previous["shots"]["mean"]
+        if same_games and mean > before * (1 + shots_threshold):
+
+            regressions.append(strategy + " mean shots rose from " + str(round(before, 4)) + " to " +
+                               str(round(mean, 4)))
+
+    return regressions
+
+
+def print_benchmarks(results):
+    """
+    Prints the results of run_benchmarks().
+
+    Parameters:
+        results (dict): The results of run_benchmarks().
+    """
+    print("Logging off: " + ", ".join(name + " " + str(round(nanoseconds, 1)) + " ns"
+                                      for name, nanoseconds in results["logging_ns"].items()))
+    for strategy, result in results["strategies"].items():
+
+        shots = result["shots"]
+        print(strategy + ": " + str(round(result["games_per_sec"], 1)) + " games/sec, take_turn " +
+              str(round(result["take_turn_ns"])) + " ns")
+        print("    " + ", ".join(name + " " + str(round(nanoseconds, 1)) + " ns"
+                                 for name, nanoseconds in result["calls_ns"].items()))
+        print("    shots to win: mean " + str(round(shots["mean"], 4)) + ", stddev " +
+              str(round(shots["stddev"], 4)) + ", min " + str(shots["min"]) + ", " +
+              ", ".join("p" + percent + " " + str(value) for percent, value in shots["percentiles"].items()) +
+              ", max " + str(shots["max"]))
+
+
+def strategy_arg(strategy):
+    """
+    Checks a --strategy or --compare value against the policy registry.
+
+    Parameters:
+        strategy (str): The strategy name from the command line.
+    Returns:
+        str: The same name.
+    """
+    try:
+
+        split_strategy(strategy)
+
+    except ValueError as error:
+
+        raise argparse.ArgumentTypeError(str(error))
+
+    return strategy
+
+
+def fleet_arg(text):
+    """
+    Parses a --fleet value, reporting why it is invalid.
+
+    Parameters:
+        text (str): The fleet from the command line.
+    Returns:
+        tuple: The (name, size, count) fleet entries.
+    """
+    try:
+
+        return GameConfig.parse_fleet(text)
+
+    except ValueError as error:
+
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def parse_args(argv=None):
+    """Parses the command line options."""
+    parser = argparse.ArgumentParser(description="Battleship hunter game and simulator.")
+    parser.add_argument("--headless", type=int, metavar="N", default=0,
+                        help="play N games without the UI and print the averages")
+    parser.add_argument("--strategy", type=strategy_arg, default="basic",
+                        help='hunter strategy to use, a policy name or a "hunt:target" pair')
+    parser.add_argument("--list-strategies", action="store_true",
+                        help="print the registered hunt and target policies and exit")
+    parser.add_argument("--seed", type=int, default=None, help="master random seed for the run")
+    parser.add_argument("--game", type=int, default=1,
+                        help="number of the first game, so --game N --headless 1 re-runs game N")
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python",
+                        help="play headless games one at a time or in NumPy batches")
+    parser.add_argument("--record", metavar="PATH", default=None,
+                        help="record the headless games to a replay file")
+    parser.add_argument("--store", metavar="DIR", default=None,
+                        help="write the headless games' stats to a memory-mapped results store")
+    parser.add_argument("--read-store", metavar="DIR", default=None,
+                        help="print the aggregates of a results store, which may still be written")
+    parser.add_argument("--replay", metavar="PATH", default=None,
+                        help="show the games of a replay file in the UI")
+    parser.add_argument("--replay-games", type=int, nargs="*", default=None,
+                        help="only replay the games with these numbers")
+    parser.add_argument("--check", action="store_true",
+                        help="with --replay, check the recorded results headlessly instead")
+    parser.add_argument("--compare", type=strategy_arg, nargs=2, metavar=("A", "B"), default=None,
+                        help="play two strategies until their mean total shots differ significantly")
+    parser.add_argument("--confidence", type=float, default=0.95, help="confidence for --compare")
+    parser.add_argument("--max-games", type=int, default=100000,
+                        help="the most games of each strategy for --compare")
+    parser.add_argument("--live", type=int, metavar="N", default=0,
+                        help="play N games at full speed while the UI shows sampled frames")
+    parser.add_argument("--fps", type=int, default=30, help="frame rate of the --live UI")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="spread the headless games over this many processes")
+    parser.add_argument("--width", type=int, default=10, help="width of the board")
+    parser.add_argument("--height", type=int, default=10, help="height of the board")
+    parser.add_argument("--log-level", choices=[level.name for level in LogLevel], default="OFF",
+                        help="console messages to print in the interactive game")
+    parser.add_argument("--bench-logging", action="store_true",
+                        help="time the per-shot cost of disabled logging and exit")
+    parser.add_argument("--match", type=strategy_arg, nargs=2, metavar=("A", "B"), default=None,
+                        help="play --headless head-to-head matches (1000 by default) between two strategies")
+    parser.add_argument("--rank", type=strategy_arg, nargs="+", metavar="STRATEGY", default=None,
+                        help="rank strategies by win rate over --headless matches per pair")
+    parser.add_argument("--serve", action="store_true",
+                        help="host games for remote hunters on --port or --unix until interrupted")
+    parser.add_argument("--load", type=int, metavar="N", default=0,
+                        help="play on a running server from N concurrent client sessions")
+    parser.add_argument("--load-games", type=int, default=10, help="games each --load session plays")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP address for --serve and --load")
+    parser.add_argument("--port", type=int, default=7777, help="TCP port for --serve and --load")
+    parser.add_argument("--unix", metavar="PATH", default=None,
+                        help="use a Unix socket instead of TCP for --serve and --load")
+    parser.add_argument("--move-timeout", type=float, default=5.0,
+                        help="seconds a --serve client has for each move")
+    parser.add_argument("--profile", metavar="PATH", default=None,
+                        help="time the phases of the games, print a report and save a pstats file")
+    parser.add_argument("--bench", type=strategy_arg, nargs="*", metavar="STRATEGY", default=None,
+                        help="run the benchmark suite for these strategies, or every hunt:target pair, "
+                             "over --headless games (1000 by default) from --seed (0 by default)")
+    parser.add_argument("--bench-out", metavar="PATH", default=None,
+                        help="save the benchmark results as JSON")
+    parser.add_argument("--bench-baseline", metavar="PATH", default=None,
+                        help="compare the benchmark against saved results and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="the slowdown, as a fraction, that --bench-baseline reports")
+    parser.add_argument("--tune-placement", type=int, metavar="ROUNDS", default=0,
+                        help="tune an adversarial fleet placement against --strategy over ROUNDS rounds "
+                             "of --headless games (1000 by default)")
+    parser.add_argument("--heat-map", metavar="PATH", default=None,
+                        help="save the heat map of the best --tune-placement placement")
+    parser.add_argument("--adversarial", metavar="PATH", default=None,
+                        help="place the --headless fleets adversarially from a saved heat map")
+    parser.add_argument("--temperature", type=float, default=2.0,
+                        help="how strongly adversarial placement favours the cells fired at last")
+    parser.add_argument("--samples", type=int, default=MonteCarloPolicy.samples,
+                        help="fleet configurations the montecarlo policy keeps sampled")
+    parser.add_argument("--turn-budget", type=float, default=0,
+                        help="seconds a montecarlo turn may spend sampling, or 0 for no limit; a limit "
+                             "makes the games depend on the machine's speed, so a seed won't repeat them")
+    parser.add_argument("--fleet", type=fleet_arg, default=GameConfig.STANDARD_FLEET,
+                        help='fleet as name:size[xcount] entries, e.g. "Destroyer:2x3,Carrier:5"')
+    args = parser.parse_args(argv)
+    # Options that one way of playing the games doesn't support are rejected, not ignored.
+    if args.engine == "numpy" and args.workers:
+
+        parser.error("--engine numpy plays its batches in one process, so it can't be used with --workers")
+
+    if args.engine == "numpy":
+
+        try:
+
+            BatchEngine.policy(args.strategy)
+
+        except ValueError as error:
+
+            parser.error(str(error))
+
+    if args.store and (args.workers or args.engine == "numpy"):
+
+        parser.error("--store only stores games played by one process with --engine python")
+
+    if args.record and (args.workers or args.engine == "numpy"):
+
+        parser.error("--record only records games played by one process with --engine python")
+
+    # The profiler and adversarial placement apply to a GameManager's games, which only plain
+    # headless runs and the interactive game play through one manager.
+    other_modes = {"--workers": args.workers, "--engine numpy": args.engine == "numpy", "--store": args.store,
+                   "--compare": args.compare, "--match": args.match, "--rank": args.rank, "--live": args.live,
+                   "--serve": args.serve, "--load": args.load, "--bench": args.bench is not None,
+                   "--tune-placement": args.tune_placement, "--replay": args.replay}
+    if args.profile and any(other_modes.values()):
+
+        parser.error("--profile can't be used with " + ", ".join(name for name, used in other_modes.items() if used))
+
+    if args.adversarial and (not args.headless or any(other_modes.values())):
+
+        parser.error("--adversarial only places the fleets of plain --headless runs")
+
+    return args
+
+
+# Entry point of the program.
+if __name__ == '__main__':
+
+    args = parse_args()
+    try:
+
+        config = GameConfig(args.width, args.height, args.fleet)
+
+    except ValueError as error:
+
+        sys.exit(str(error))
+
+    MonteCarloPolicy.samples = args.samples
+    MonteCarloPolicy.time_budget = args.turn_budget or None
+    # Pick and show the master seed, so that any run can be repeated. Benchmarks use a fixed
+    # seed instead, so their shots to win can be compared between runs.
+    if args.seed is None and args.bench is None:
+
+        args.seed = random.randrange(2 ** 32)
+
+    if (args.headless or args.compare or args.live or args.serve or args.load or args.match or args.rank or
+            args.tune_placement) and args.bench is None:
+
+        print("Seed: " + str(args.seed))
+
+    if args.list_strategies:
+
+        print("Hunt policies: " + ", ".join(sorted(HUNT_POLICIES)))
+        print("Target policies: " + ", ".join(sorted(TARGET_POLICIES)))
+
+    elif args.match:
+
+        start = time.perf_counter()
+        matches = args.headless or 1000
+        results = run_matches(matches, *args.match, seed=args.seed, config=config, first_match=args.game)
+        elapsed = time.perf_counter() - start
+        print("Matches: " + str(matches) + " in " + str(round(elapsed, 2)) + "s (" +
+              str(round(matches / max(elapsed, 1e-9), 1)) + " matches/sec)")
+        for name, strategy in zip(("a", "b"), args.match):
+
+            print(strategy + " wins: " + str(results[name]) + " (" + str(round(results[name] / matches * 100, 2)) +
+                  "%)")
+
+        print("Draws: " + str(results["draw"]) + " (" + str(round(results["draw"] / matches * 100, 2)) + "%)")
+        print("Average Shots Per Player: " + str(round(sum(results["shots"]) / matches, 4)))
+
+    elif args.rank:
+
+        for strategy, rate, wins, draws, losses in rank_strategies(args.rank, args.headless or 1000, args.seed,
+                                                                   config):
+
+            print(strategy + ": win rate " + str(round(rate * 100, 2)) + "% (" + str(wins) + " won, " +
+                  str(draws) + " drawn, " + str(losses) + " lost)")
+
+    elif args.tune_placement:
+
+        games = args.headless or 1000
+        placement, history = tune_placement(args.strategy, args.tune_placement, games, args.temperature,
+                                            args.seed, config)
+        for round_num, mean_shots in enumerate(history):
+
+            print("Round " + str(round_num + 1) + (" (uniform)" if round_num == 0 else "") +
+                  ": average total shots " + str(round(mean_shots, 4)))
+
+        if placement is None:
+
+            print("No adversarial placement beat uniform placement")
+
+        elif args.heat_map:
+
+            placement.heat_map.save(args.heat_map)
+            print("Saved the best placement's heat map to " + args.heat_map)
+
+    elif args.serve:
+
+        server = GameServer(config, args.seed, args.move_timeout)
+        try:
+
+            asyncio.run(serve(server, args.host, args.port, args.unix))
+
+        except KeyboardInterrupt:
+
+            pass
+
+        total_shots = server.results_store.stats["total_shots"]
+        print("Games won: " + str(server.results_store.count) + ", mean total shots " +
+              str(round(total_shots.mean, 4)) + ", sessions timed out: " + str(server.timeouts))
+
+    elif args.load:
+
+        load = asyncio.run(run_load(args.load, args.load_games, args.strategy, args.seed, args.host, args.port,
+                                    args.unix))
+        print("Games: " + str(load["games"]) + " in " + str(round(load["elapsed"], 2)) + "s (" +
+              str(round(load["games"] / load["elapsed"], 1)) + " games/sec, " +
+              str(round(load["shots"] / load["elapsed"], 1)) + " shots/sec)")
+        print("Average Total Shots: " + str(round(load["mean_shots"], 4)))
+        print("Shot round trip: mean " + str(round(load["latency"].mean * 1000, 3)) + " ms, stddev " +
+              str(round(load["latency"].stddev() * 1000, 3)) + " ms")
+
+    elif args.bench is not None:
+
+        results = run_benchmarks(args.bench, args.headless or 1000, args.seed or 0, config)
+        print_benchmarks(results)
+        if args.bench_out:
+
+            with open(args.bench_out, "w") as file:
+
+                json.dump(results, file, indent=2)
+
+        if args.bench_baseline:
+
+            with open(args.bench_baseline) as file:
+
+                regressions = compare_benchmarks(results, json.load(file), args.threshold)
+
+            print("Regressions: " + ("; ".join(regressions) or "none"))
+            if regressions:
+
+                sys.exit(1)
+
+    elif args.bench_logging:
+
+        for name, nanoseconds in benchmark_logging().items():
+
+            print(name.capitalize() + " logging: " + str(round(nanoseconds, 1)) + " ns per shot")
+
+    elif args.compare:
+
+        start = time.perf_counter()
+        comparison = compare_strategies(*args.compare, confidence=args.confidence,
+                                        max_games=args.max_games, seed=args.seed, config=config)
+        winner = comparison["winner"]
+        print("Games per strategy: " + str(comparison["games"]) + " in " +
+              str(round(time.perf_counter() - start, 2)) + "s")
+        print("Mean total shots: " + args.compare[0] + " " + str(round(comparison["mean_a"], 4)) + ", " +
+              args.compare[1] + " " + str(round(comparison["mean_b"], 4)))
+        print("Difference: " + str(round(comparison["difference"], 4)) + " (" +
+              ", ".join(str(round(bound, 4)) for bound in comparison["interval"]) + ")")
+        print("Better: " + ("inconclusive" if winner is None else args.compare[0 if winner == "a" else 1]))
+
+    elif args.read_store:
+
+        store = ResultsStore(args.read_store)
+        print_store(store)
+        store.close()
+
+    elif args.headless and args.store:
+
+        store = ResultsStore(args.store, "w", config.width * config.height)
+        start = time.perf_counter()
+        run_simulations(args.headless, args.strategy, args.seed, config, args.record, store, args.game)
+        print_store(store, time.perf_counter() - start)
+        store.close()
+
+    elif args.replay and args.check:
+
+        mismatches = Replayer(args.replay).check()
+        print("Mismatched games: " + (", ".join(map(str, mismatches)) or "none"))
+
+    elif args.replay:
+
+        Replayer(args.replay).show(None if args.replay_games is None else set(args.replay_games))
+
+    elif args.live:
+
+        game_manager = GameManager(headless=True, strategy=args.strategy, config=config, seed=args.seed,
+                                   game_num=args.game)
+        start = time.perf_counter()
+        LiveRunner(game_manager, args.live, args.fps).run()
+        print_results(run_results(game_manager), time.perf_counter() - start)
+
+    elif args.headless and args.workers:
+
+        start = time.perf_counter()
+        results, games_per_sec = run_tournament(args.headless, args.strategy, args.seed, args.workers,
+                                                config=config)
+        print_results(results, time.perf_counter() - start)
+        print("Workers: " + str(args.workers) + " (" + str(round(games_per_sec / args.workers, 1)) +
+              " games/sec per worker)")
+
+    elif args.headless and args.engine == "numpy":
+
+        start = time.perf_counter()
+        results = run_batch(args.headless, args.strategy, args.seed, config)
+        print_results(results, time.perf_counter() - start)
+
+    elif args.headless:
+
+        profiler = None if args.profile is None else Profiler()
+        placement = None
+        if args.adversarial:
+
+            try:
+
+                heat_map = ShotHeatMap.load(args.adversarial)
+
+            except ValueError as error:
+
+                sys.exit(str(error))
+
+            if (heat_map.width, heat_map.height) != (config.width, config.height):
+
+                sys.exit(args.adversarial + " is a heat map of a " + str(heat_map.width) + "x" +
+                         str(heat_map.height) + " board")
+
+            placement = AdversarialPlacement(heat_map, config, args.temperature)
+
+        start = time.perf_counter()
+        results = run_simulations(args.headless, args.strategy, args.seed, config, args.record,
+                                  first_game=args.game, profiler=profiler, placement=placement)
+        print_results(results, time.perf_counter() - start)
+        if profiler is not None:
+
+            profiler.detach()
+            print(profiler.report())
+            profiler.dump_stats(args.profile)
+
+    else:
+
+        # The interactive game runs until the window is closed, which exits, so the profile is
+        # written on the way out.
+        profiler = None if args.profile is None else Profiler()
+        try:
+
+            game_manager = GameManager(strategy=args.strategy, config=config,
+                                       log_level=LogLevel[args.log_level], seed=args.seed,
+                                       game_num=args.game, profiler=profiler)
+
+        finally:
+
+            if profiler is not None:
 
-    game_manager = GameManager()
+                profiler.detach()
+                print(profiler.report())
+                profiler.dump_stats(args.profile)
@@ -0,0 +1,11 @@
+import importlib.util
+import os
+import sys
+
+# The game is a single script with spaces in its name, so it is loaded from its path once, for
+# the tests to import as battle_ship_game.
+PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "battle ship game.py")
+spec = importlib.util.spec_from_file_location("battle_ship_game", PATH)
+game = importlib.util.module_from_spec(spec)
+sys.modules["battle_ship_game"] = game
+spec.loader.exec_module(game)
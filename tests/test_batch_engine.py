@@ -0,0 +1,20 @@
+from statistics import NormalDist, fmean, variance
+
+import pytest
+
+import battle_ship_game as game
+
+pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize("strategy", game.BatchEngine.STRATEGIES)
+def test_engine_matches_scalar_hunter(strategy):
+    games = 1000
+    batch = game.BatchEngine(games, strategy=strategy, seed=21).run()
+    scalar = game.run_simulations(games, strategy, seed=22)
+    # A two-sided z-test of the difference in mean total shots at the 0.001 level.
+    a, b = batch["total_shots"], scalar["total_shots"]
+    error = (variance(a) / len(a) + variance(b) / len(b)) ** 0.5
+    assert abs(fmean(a) - fmean(b)) < NormalDist().inv_cdf(0.9995) * error
+    assert all(len(turns) == len(game.GameConfig().ships) for turns in batch["sink_turns"])
+    assert [max(turns.values()) for turns in batch["sink_turns"]] == batch["total_shots"]
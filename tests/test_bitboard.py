@@ -0,0 +1,42 @@
+import battle_ship_game as game
+
+
+def ship_cells(game_manager, ship_cell):
+    """Returns the positions of a placed ship's cells."""
+    board = game_manager.board
+    mask = board.masks[ship_cell]
+    return [board.position(index) for index in range(board.width * board.height) if mask >> index & 1]
+
+
+def test_set_and_get_keep_one_cell_per_bit():
+    board = game.Bitboard(4, 3)
+    board.set((1, 2), game.ShipCell.MISS)
+    board.set((1, 2), game.ShipCell.DESTROYER)
+    assert board.get((1, 2)) == game.ShipCell.DESTROYER
+    assert board.masks[game.ShipCell.MISS] == 0
+    assert board.occupied == board.bit((1, 2))
+    board.set((1, 2), game.ShipCell.EMPTY)
+    assert board.get((1, 2)) == game.ShipCell.EMPTY
+    assert board.occupied == 0
+
+
+def test_hits_sink_each_ship_once():
+    game_manager = game.GameManager(headless=True, seed=2)
+    game_manager.place_ships()
+    ships = list(game_manager.ships.items())
+    empty = game_manager.board.empty_mask()
+    assert game_manager.check_hit(game_manager.board.position((empty & -empty).bit_length() - 1)) == game.ShipCell.MISS
+    for sunk, (ship_cell, ship) in enumerate(ships, 1):
+
+        cells = ship_cells(game_manager, ship_cell)
+        for position in cells[:-1]:
+
+            assert game_manager.check_hit(position) == ship_cell
+            # A repeated shot at a hit cell doesn't count towards sinking the ship.
+            assert game_manager.check_hit(position) == ship_cell
+            assert not ship.sunk
+
+        assert game_manager.check_hit(cells[-1]) == ship_cell
+        assert ship.sunk and ship.sunk_turn == game_manager.turn
+        assert game_manager.ships_remaining == len(ships) - sunk
+
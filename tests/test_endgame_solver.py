@@ -0,0 +1,37 @@
+from functools import lru_cache
+
+import pytest
+
+import battle_ship_game as game
+
+
+@pytest.mark.parametrize("width, height, sizes", [(3, 3, (3, 2)), (4, 2, (2, 2))])
+def test_solver_finds_the_optimal_shot(width, height, sizes):
+    solver = game.EndgameSolver(width, height, (), max_nodes=1 << 20)
+    configs = []
+    solver.enumerate([game.placement_index(width, height, size).masks for size in sizes], 0, 0, (), configs)
+
+    def shot_value(configs, shot, index):
+        """Returns the expected shots left after firing at a cell and then playing optimally."""
+        groups = {}
+        for config in configs:
+
+            outcome = next((ship for ship, mask in enumerate(config[1]) if mask >> index & 1), -1)
+            groups.setdefault(outcome, []).append(config)
+
+        return 1 + sum(len(group) / len(configs) * brute_force(tuple(group), shot | 1 << index)
+                       for group in groups.values())
+
+    @lru_cache(maxsize=None)
+    def brute_force(configs, shot):
+        """Tries every shot, including the ones the solver prunes, and returns the least expected shots left."""
+        if len(configs) == 1:
+
+            return (configs[0][0] & ~shot).bit_count()
+
+        return min(shot_value(configs, shot, index) for index in range(width * height) if not shot >> index & 1)
+
+    expected, index = solver.solve(configs, (), 0, (0,) * len(sizes), 0)
+    optimum = brute_force(tuple(configs), 0)
+    assert expected == pytest.approx(optimum)
+    assert shot_value(configs, 0, index) == pytest.approx(optimum)
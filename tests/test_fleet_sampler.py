@@ -0,0 +1,86 @@
+import random
+from statistics import NormalDist
+
+import battle_ship_game as game
+
+
+def rejection_fleet(config, rng):
+    """Places a fleet the way place_ships did before FleetSampler, retrying until a ship fits."""
+    occupied = 0
+    for _, _, size in config.ships:
+
+        index = game.placement_index(config.width, config.height, size)
+        while True:
+
+            mask = index.masks[rng.randrange(len(index.masks))]
+            if not mask & occupied:
+
+                occupied |= mask
+                break
+
+    return occupied
+
+
+def occupancy(masks, cells):
+    """Counts the masks occupying each cell."""
+    return [sum(mask >> cell & 1 for mask in masks) for cell in range(cells)]
+
+
+def test_sampler_matches_rejection_placement():
+    config = game.GameConfig()
+    cells = config.width * config.height
+    fleets = 4000
+    game_manager = game.GameManager(headless=True, config=config, seed=11)
+    sampled = []
+    for _ in range(fleets):
+
+        game_manager.place_ships()
+        sampled.append(game_manager.board.occupied)
+        game_manager.game_num += 1
+
+    rng = random.Random(12)
+    rejected = [rejection_fleet(config, rng) for _ in range(fleets)]
+    # A chi-square test of homogeneity of the per-cell occupancy of the two placers, against
+    # the Wilson-Hilferty approximation of the critical value at the 0.001 level.
+    statistic = 0
+    for a, b in zip(occupancy(sampled, cells), occupancy(rejected, cells)):
+
+        if a + b:
+
+            expected = (a + b) / 2
+            statistic += (a - expected) ** 2 / expected + (b - expected) ** 2 / expected
+
+    df = cells - 1
+    z = NormalDist().inv_cdf(0.999)
+    critical = df * (1 - 2 / (9 * df) + z * (2 / (9 * df)) ** 0.5) ** 3
+    assert statistic < critical
+
+
+def test_fleet_depends_only_on_seed_and_game():
+    config = game.GameConfig()
+    later = game.GameManager(headless=True, config=config, seed=5)
+    for game_num in range(1, 20):
+
+        later.game_num = game_num
+        later.place_ships()
+
+    fresh = game.GameManager(headless=True, config=config, seed=5, game_num=19)
+    fresh.place_ships()
+    assert later.board.masks == fresh.board.masks
+
+
+def test_reset_restores_every_placement():
+    config = game.GameConfig()
+    sampler = game.FleetSampler(config.width, config.height, [size for _, _, size in config.ships])
+    built = {size: list(placements) for size, placements in sampler.open.items()}
+    sampler.reset(random.Random(3))
+    for size in (5, 4, 3, 3, 2):
+
+        index, placement = sampler.sample(size)
+        sampler.block(index.cells[placement])
+
+    sampler.reset(random.Random(4))
+    assert sampler.open == built
+    assert all(sampler.slots[size] == list(range(len(placements))) for size, placements in built.items())
+    assert sampler.counts == {size: len(placements) for size, placements in built.items()}
+    assert not any(sampler.touched.values())
@@ -0,0 +1,49 @@
+import pytest
+
+import battle_ship_game as game
+
+
+def test_repeated_ships_each_get_a_cell():
+    config = game.GameConfig(fleet=game.GameConfig.parse_fleet("Destroyer:2x2,Carrier:5"))
+    cells = [ship_cell for ship_cell, name, size in config.ships]
+    assert len(set(cells)) == 3
+    game_manager = game.GameManager(headless=True, config=config, seed=1)
+    game_manager.run_game()
+    assert game_manager.shots_hit == [2 + 2 + 5]
+
+
+@pytest.mark.parametrize("text", [
+    "Destroyer:2,Destroyer:3",
+    "Destroyer:0",
+    "Destroyer:-2",
+    "Destroyer:2x0",
+    "Destroyer",
+])
+def test_invalid_fleets_are_rejected(text):
+    with pytest.raises(ValueError):
+
+        game.GameConfig.parse_fleet(text)
+
+
+def test_invalid_fleet_entries_are_rejected_by_config():
+    for fleet in ((("Destroyer", 2, 1), ("Destroyer", 3, 1)), (("Destroyer", 0, 1),), (("Destroyer", 2, 0),), ()):
+
+        with pytest.raises(ValueError):
+
+            game.GameConfig(fleet=fleet)
+
+
+def test_expanded_names_must_be_distinct():
+    with pytest.raises(ValueError):
+
+        game.GameConfig(fleet=game.GameConfig.parse_fleet("Destroyer:2x2,Destroyer 1:3"))
+
+
+@pytest.mark.parametrize("name", ["Miss", "Empty"])
+def test_cell_names_are_ordinary_ships(name):
+    config = game.GameConfig(fleet=((name, 3, 1), ("Destroyer", 2, 1)))
+    ship_cell = config.ships[0][0]
+    assert ship_cell not in (game.ShipCell.MISS, game.ShipCell.EMPTY)
+    game_manager = game.GameManager(headless=True, config=config, seed=2)
+    game_manager.run_game()
+    assert game_manager.shots_hit == [5]
@@ -0,0 +1,46 @@
+import asyncio
+
+import battle_ship_game as game
+
+
+async def session(lines):
+    """Sends lines to a fresh server and returns every reply up to the end of the session."""
+    server = game.GameServer(seed=6, move_timeout=2.0)
+    listener = await server.start()
+    reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+    for line in lines:
+
+        writer.write(line)
+
+    await writer.drain()
+    replies = (await reader.read()).decode().splitlines()
+    writer.close()
+    listener.close()
+    await listener.wait_closed()
+    return replies
+
+
+def test_bad_lines_get_errors_and_the_session_goes_on():
+    replies = asyncio.run(session([b"FIRE 1\n", b"FIRE 10 0\n", b"HELLO\n", b"x" * 100000 + b"\n",
+                                   b"FIRE 0 0\n", b"QUIT\n"]))
+    assert replies[0] == "HELLO 10 10 " + game.GameConfig().format_fleet()
+    assert replies[1] == "GAME 1"
+    assert replies[2:5] == ["ERROR expected FIRE <x> <y> on the board"] * 3
+    assert "ERROR line too long" in replies[5:-2]
+    assert all(reply.startswith("ERROR") for reply in replies[5:-2])
+    assert replies[-2] in ("MISS", "HIT 0", "HIT 1", "HIT 2", "HIT 3", "HIT 4")
+    assert replies[-1] == "BYE"
+
+
+def test_game_is_won_and_a_new_one_starts():
+    config = game.GameConfig()
+    shots = [b"FIRE %d %d\n" % (x, y) for y in range(config.height) for x in range(config.width)]
+    replies = asyncio.run(session(shots + [b"NEW\n", b"QUIT\n"]))
+    win = next(number for number, reply in enumerate(replies) if reply.startswith("WIN"))
+    results = replies[2:win]
+    assert replies[win] == "WIN %d" % len(results)
+    assert sum(result.startswith("SUNK") for result in results) == len(config.ships)
+    assert sum(result != "MISS" for result in results) == sum(size for _, _, size in config.ships)
+    # The shots after the win aren't a NEW, so each is an error, until NEW starts game 2.
+    assert replies[win + 1:-2] == ["ERROR expected NEW or QUIT"] * (len(shots) - len(results))
+    assert replies[-2:] == ["GAME 2", "BYE"]
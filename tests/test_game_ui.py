@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+import battle_ship_game as game
+
+pygame = pytest.importorskip("pygame")
+
+
+def full_redraw(ui, snapshot):
+    """Draws a frame the way GameUI.display did before it redrew only the changes."""
+    ui.screen.fill((0, 0, 0))
+    ui.draw_board(snapshot.board)
+    text = ui.font.render(f"Game #{snapshot.game_num}", True, (255, 255, 255))
+    ui.screen.blit(text, (10, 10))
+    text = ui.font.render(
+        f"Shots: {snapshot.total_shots} | " +
+        f"Hits: {snapshot.shots_hit} | " +
+        f"Accuracy: {round((snapshot.shots_hit / max(1, snapshot.total_shots)) * 100, 2)}%",
+        True,
+        (255, 255, 255)
+    )
+    ui.screen.blit(text, (10, 40))
+
+
+def test_changed_frames_match_full_redraws(monkeypatch):
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    game_manager = game.GameManager(headless=True, seed=3)
+    ui = game.GameUI(game_manager)
+    rng = random.Random(4)
+    try:
+
+        for game_num in (1, 2):
+
+            game_manager.game_num = game_num
+            game_manager.place_ships()
+            board = game.Bitboard(game_manager.config.width, game_manager.config.height)
+            cells = [board.position(index) for index in range(game_manager.config.width * game_manager.config.height)]
+            rng.shuffle(cells)
+            shots_hit = 0
+            for total_shots, position in enumerate(cells, 1):
+
+                result = game_manager.check_hit(position)
+                board.set(position, result)
+                shots_hit += result != game.ShipCell.MISS
+                snapshot = game.BoardSnapshot(game_num, board, total_shots, shots_hit)
+                ui.display(snapshot)
+                frame = pygame.image.tobytes(ui.screen, "RGB")
+                full_redraw(ui, snapshot)
+                assert frame == pygame.image.tobytes(ui.screen, "RGB")
+                if not game_manager.ships_remaining:
+
+                    break
+
+    finally:
+
+        pygame.quit()
@@ -0,0 +1,25 @@
+import battle_ship_game as game
+
+
+def test_recording_round_trip(tmp_path):
+    path = str(tmp_path / "games.bsr")
+    results = game.run_simulations(300, seed=8, record=path, first_game=5)
+    replayer = game.Replayer(path)
+    games = list(replayer.games())
+    assert [recorded.game_num for recorded in games] == list(range(5, 305))
+    assert [len(recorded.shots) for recorded in games] == results["total_shots"]
+    assert replayer.check() == []
+    # The recorded fleet is the one the seed places for the game.
+    game_manager = game.GameManager(headless=True, seed=8, game_num=17)
+    game_manager.place_ships()
+    assert games[12].placements == [(ship.position, ship.orientation) for ship in game_manager.ships.values()]
+
+
+def test_changed_shot_is_a_mismatch(tmp_path):
+    path = str(tmp_path / "games.bsr")
+    game.run_simulations(3, seed=8, record=path)
+    replayer = game.Replayer(path)
+    recorded = next(replayer.games())
+    recorded.shots[-1] = (recorded.shots[-1][0], game.ShipCell.MISS)
+    replayer.games = lambda: iter([recorded])
+    assert replayer.check() == [recorded.game_num]
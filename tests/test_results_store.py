@@ -0,0 +1,37 @@
+from statistics import fmean, variance
+
+import pytest
+
+import battle_ship_game as game
+
+
+def test_store_matches_in_memory_stats(tmp_path):
+    path = str(tmp_path / "store")
+    expected = game.run_simulations(500, seed=3)
+    # A tiny capacity and histogram make the writer grow both.
+    writer = game.ResultsStore(path, "w", max_shots=10, capacity=16)
+    assert game.run_simulations(500, seed=3, store=writer)["total_shots"] == []
+    reader = game.ResultsStore(path)
+    assert reader.count == 500
+    writer.close()
+    reader.refresh()
+    for name, typecode in game.ResultsStore.COLUMNS:
+
+        values = expected[name]
+        assert reader.column(name).tolist() == pytest.approx(values)
+        assert reader.stats[name].mean == pytest.approx(fmean(values))
+        assert reader.stats[name].variance() == pytest.approx(variance(values))
+
+    histogram = reader.histogram.values
+    assert sum(histogram) == 500
+    assert all(histogram[total] == expected["total_shots"].count(total) for total in set(expected["total_shots"]))
+    reader.close()
+
+
+def test_reader_rejects_other_files(tmp_path):
+    game.ResultsStore(str(tmp_path), "w").close()
+    meta = tmp_path / "meta.bin"
+    meta.write_bytes(b"XXXX" + meta.read_bytes()[4:])
+    with pytest.raises(ValueError):
+
+        game.ResultsStore(str(tmp_path))